@@ -0,0 +1,91 @@
+"""
+Micro-benchmark das variáveis derivadas: versão linha a linha (notebook) x vetorizada.
+
+Uso (a partir da pasta APP):
+    python -m benchmarks.bench_features --input ../kc_house_data.csv --scale 10
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import features, pipeline
+
+
+def rowwise_features(data):
+    # Mesmas expressões usadas no notebook e em data_transform
+    data['has_basement'] = data.apply(lambda x: 1 if x['sqft_basement'] != 0 else 0, axis=1)
+    data['new_house'] = data.apply(lambda x: 1 if x['yr_built'] < 1955 else 0, axis=1)
+    data['season'] = data['date'].apply(lambda date: 'summer' if date in pd.date_range(start=f'{date.year}-06-01', end=f'{date.year}-08-31') else
+        'spring' if date in pd.date_range(start=f'{date.year}-03-01', end=f'{date.year}-05-31') else
+        'fall' if date in pd.date_range(start=f'{date.year}-09-01', end=f'{date.year}-11-30') else
+        'winter')
+    data['valor_m2'] = data.apply(lambda x: x['price']/x['sqft_lot'], axis=1)
+
+    median_price = data.groupby('zipcode')['price'].transform('median')
+    data['Median Price'] = median_price
+    data['status'] = data.apply(lambda x: 'Buy' if (x['price'] < x['Median Price']) and (x['condition'] == 3) else 'Not Buy', axis=1)
+
+    # Mediana por (zipcode, season) apenas dos imóveis Buy, como em pipeline.compute_medians
+    buy = data['status'] == 'Buy'
+    data['Season Median'] = data.loc[buy].groupby(['zipcode', 'season'])['price'].transform('median')
+    data['Sell Price'] = data.apply(lambda x: (x['price'] * 1.3 if x['price'] < x['Season Median'] else x['price'] * 1.1) if x['status'] == 'Buy' else 0.0, axis=1)
+    data['Profit'] = data.apply(lambda x: (x['Sell Price'] - x['price']) if x['status'] == 'Buy' else 0.0, axis=1)
+
+    return data.drop(columns=['Median Price', 'Season Median'])
+
+
+def vectorized_features(data):
+    data = features.add_house_features(data)
+    data = features.add_date_features(data)
+
+    medians = pipeline.compute_medians(data)
+    median_price = data['zipcode'].map(medians['zipcode'])
+    data['status'] = features.buy_status(data['price'], median_price, data['condition'])
+
+    season_median = pipeline.lookup_season_median(data, medians)
+    data = features.add_sell_features(data, season_median)
+
+    return data
+
+
+def load_input(filepath, scale):
+    data = pd.read_csv(filepath, parse_dates=['date'])
+    if scale > 1:
+        data = pd.concat([data] * scale, ignore_index=True)
+
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default='../kc_house_data.csv')
+    parser.add_argument('--scale', type=int, default=1, help='Replica o dataset N vezes.')
+    args = parser.parse_args()
+
+    data = load_input(args.input, args.scale)
+    print(f'Linhas: {data.shape[0]}')
+
+    start = time.perf_counter()
+    expected = rowwise_features(data.copy())
+    t_rowwise = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = vectorized_features(data.copy())
+    t_vectorized = time.perf_counter() - start
+
+    cols = ['has_basement', 'new_house', 'season', 'valor_m2', 'status', 'Sell Price', 'Profit']
+    for col in cols:
+        if pd.api.types.is_numeric_dtype(expected[col]):
+            assert np.allclose(expected[col].to_numpy(dtype='float64'), result[col].to_numpy(dtype='float64')), col
+        else:
+            assert (expected[col].to_numpy() == result[col].to_numpy()).all(), col
+
+    print(f'Linha a linha: {t_rowwise:.3f}s')
+    print(f'Vetorizado:    {t_vectorized:.3f}s')
+    print(f'Speedup:       {t_rowwise / t_vectorized:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark do mapa de densidade: loop de ``folium.Marker`` x ``FastMarkerCluster``.
+
+Compara o tempo de construção e o tamanho do HTML gerado.
+
+Uso (a partir da pasta APP):
+    python -m benchmarks.bench_maps --scale 1
+"""
+import argparse
+import time
+
+import folium
+import pandas as pd
+
+from folium.plugins import MarkerCluster
+
+from house_rocket import maps, store
+
+
+def build_marker_map_loop(maps_df):
+    # Implementação anterior de price_density_maps
+    density_map = folium.Map( location=[maps_df['lat'].mean(),
+        maps_df['long'].mean()],
+        default_zoom_start=15 )
+
+    marker_cluster = MarkerCluster().add_to( density_map )
+
+    for name, row in maps_df.iterrows():
+        folium.Marker( [row['lat'], row['long']],
+        popup=f"Price ${row['price']} on: {row['date']}  Features: {row['sqft_living']}"
+        + f"sqft, {row['bedrooms']} bedrooms, {row['bathrooms']}"
+        + f" bathrooms, year built: {row['yr_built']}" ).add_to( marker_cluster )
+
+    return density_map
+
+
+def measure(build, df):
+    start = time.perf_counter()
+    html = build(df).get_root().render()
+    elapsed = time.perf_counter() - start
+
+    return elapsed, len(html.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=1, help='Replica os imóveis N vezes.')
+    args = parser.parse_args()
+
+    df = store.get_dataset('recommended_buy')
+    if args.scale > 1:
+        df = pd.concat([df] * args.scale, ignore_index=True)
+    print(f'Marcadores: {df.shape[0]}')
+
+    for name, build in [('loop folium.Marker', build_marker_map_loop), ('FastMarkerCluster', maps.build_cluster_map)]:
+        elapsed, size = measure(build, df)
+        print(f'{name:<20} {elapsed:8.3f}s {size / 1024 ** 2:8.2f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+"""
+Suíte de benchmarks do caminho de dados do dashboard em datasets escalados.
+
+Para cada fator de escala, gera um ``kc_house_data`` sintético e mede:
+as contas dos relatórios (pipeline), ``get_data`` (cache frio e quente),
+a conversão para o esquema compacto, o filtro da barra lateral, a agregação do ``plot_bar_chart``,
+o ``scatter_mapbox`` (com ``maps.level_of_detail``) e a construção do mapa de densidade. Reporta tempo, throughput (linhas/s),
+pico de memória (tracemalloc) e a curva de escala de cada etapa, e salva o
+resultado em ``benchmarks/results`` para comparação entre execuções.
+
+Uso (a partir da pasta APP):
+    python -m benchmarks.bench_suite --scales 1 10 100
+    python -m benchmarks.bench_suite --scales 1 10 --compare benchmarks/results/<arquivo>.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from benchmarks import synthetic
+from house_rocket import cache, filters, maps, pipeline, schema
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# Etapas executadas a cada interação com a página inicial
+RERUN_STEPS = ['filters (apply)', 'plot_bar_chart aggregation', 'scatter_mapbox build', 'price_density_maps build']
+
+# Tempo máximo (s) de uma interação para a página ser considerada interativa
+INTERACTIVE_BUDGET = 1.0
+
+
+def measure(func, repeat=3, memory=True):
+    """
+    Retorna (melhor tempo em segundos, pico de memória em MB, resultado da função).
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+
+    return best, peak, result
+
+
+def sample_filters(data):
+    zipcodes = list(pd.unique(data['zipcode']))[:5]
+
+    return [
+        {'status': ['Buy']},
+        {'price': float(data['price'].median()), 'yr_built': 2000},
+        {'status': ['Buy'], 'zipcode': zipcodes, 'season': ['summer', 'fall'], 'date': pd.Timestamp('2015-01-01')},
+        {'waterfront': [1], 'renovated': [True], 'has_basement': [1]},
+    ]
+
+
+def bench_scale(source, scale, workdir, repeat, memory):
+    raw_path = os.path.join(workdir, 'kc_house_data.csv')
+    synthetic.generate(source, scale).to_csv(raw_path, index=False)
+
+    results = []
+
+    def record(step, rows, seconds, peak):
+        results.append({'scale': scale, 'rows': rows, 'step': step, 'seconds': seconds,
+                        'rows_per_s': rows / seconds if seconds else None, 'peak_mb': peak})
+
+    # Relatórios (pipeline)
+    data = pipeline.ingest(raw_path)
+    data = pipeline.clean(data)
+    data = pipeline.features.add_house_features(data)
+    data = pipeline.features.add_date_features(data)
+    rows = data.shape[0]
+
+    def reports():
+        medians = pipeline.compute_medians(data)
+        scored = pipeline.score(data.copy(), medians)
+        return scored, pipeline.build_reports(scored, medians)
+
+    seconds, peak, (scored, (report1, report2)) = measure(reports, repeat, memory)
+    record('report computations', rows, seconds, peak)
+    pipeline.write_outputs(workdir, scored, report1, report2)
+
+    # get_data: cache colunar frio (CSV -> transform -> Feather) e quente (memory-map)
+    csv_path = os.path.join(workdir, 'recommended_houses.csv')
+    cache_dir = os.path.join(workdir, cache.CACHE_DIR)
+
+    def cold():
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        return cache.read_csv_cached(csv_path, transform=schema.compact, dtype=schema.CSV_DTYPES, index_col=0)
+
+    def warm():
+        return cache.read_csv_cached(csv_path, transform=schema.compact, dtype=schema.CSV_DTYPES, index_col=0)
+
+    seconds, peak, _ = measure(cold, 1, memory)
+    record('get_data (cold)', rows, seconds, peak)
+    seconds, peak, df = measure(warm, repeat, memory)
+    record('get_data (warm)', rows, seconds, peak)
+
+    raw = pd.read_csv(csv_path, index_col=0, dtype=schema.CSV_DTYPES)
+    seconds, peak, _ = measure(lambda: schema.compact(raw.copy()), repeat, memory)
+    record('schema.compact', rows, seconds, peak)
+
+    # Filtros da barra lateral
+    seconds, peak, engine = measure(lambda: filters.FilterEngine(df), 1, memory)
+    record('filters (index build)', rows, seconds, peak)
+
+    states = sample_filters(df)
+
+    def apply_filters():
+        # Limpa os caches do engine: mede o caminho sem reaproveitar resultados
+        engine._masks.clear()
+        engine._results.clear()
+        return [engine.apply(state) for state in states]
+
+    seconds, peak, _ = measure(apply_filters, repeat, memory)
+    record('filters (apply)', rows, seconds / len(states), peak)
+
+    seconds, peak, _ = measure(lambda: df[['grade', 'price']].groupby('grade').mean(), repeat, memory)
+    record('plot_bar_chart aggregation', rows, seconds, peak)
+
+    def scatter_mapbox():
+        points, _ = maps.level_of_detail(df, ['price', 'valor_m2'])
+        return px.scatter_mapbox(points, lat='lat', lon='long', color='price', size='valor_m2').to_json()
+
+    seconds, peak, _ = measure(scatter_mapbox, repeat, memory)
+    record('scatter_mapbox build', rows, seconds, peak)
+
+    buy = df.loc[df['status'] == 'Buy']
+    seconds, peak, _ = measure(lambda: maps.build_cluster_map(buy).get_root().render(), 1, memory)
+    record('price_density_maps build', buy.shape[0], seconds, peak)
+
+    return results
+
+
+def scaling_exponents(runs):
+    """
+    Retorna, por etapa, o expoente b de ``tempo ~ linhas^b`` (ajuste log-log).
+    """
+    exponents = {}
+    for step, group in runs.groupby('step'):
+        if group['rows'].nunique() > 1:
+            exponents[step] = np.polyfit(np.log(group['rows']), np.log(group['seconds']), 1)[0]
+
+    return pd.Series(exponents, name='expoente')
+
+
+def interactive_limit(runs):
+    """
+    Estima o número de linhas a partir do qual uma interação passa de ``INTERACTIVE_BUDGET``.
+    """
+    rerun = runs[runs['step'].isin(RERUN_STEPS)]
+    per_scale = rerun.groupby('scale').agg({'seconds': 'sum'})
+    per_scale['rows'] = runs.groupby('scale')['rows'].max()
+    if per_scale.shape[0] < 2:
+        return None
+
+    slope, intercept = np.polyfit(np.log(per_scale['rows']), np.log(per_scale['seconds']), 1)
+    if slope <= 0:
+        return None
+
+    return float(np.exp((np.log(INTERACTIVE_BUDGET) - intercept) / slope))
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(runs, previous_path):
+    with open(previous_path) as f:
+        previous = pd.DataFrame(json.load(f)['runs'])
+
+    merged = runs.merge(previous, on=['scale', 'step'], suffixes=('', '_anterior'))
+    merged['razão'] = merged['seconds'] / merged['seconds_anterior']
+
+    return merged[['scale', 'step', 'seconds_anterior', 'seconds', 'razão']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default=synthetic.SOURCE_PATH)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='Não mede o pico de memória (mais rápido).')
+    parser.add_argument('--compare', help='Arquivo de resultados anterior para comparação.')
+    args = parser.parse_args()
+
+    source = synthetic.load_source(args.source)
+
+    results = []
+    for scale in args.scales:
+        print(f'Escala {scale}x ({source.shape[0] * scale} linhas)...')
+        with tempfile.TemporaryDirectory() as workdir:
+            results.extend(bench_scale(source, scale, workdir, args.repeat, not args.no_memory))
+
+    runs = pd.DataFrame(results)
+    with pd.option_context('display.width', 200, 'display.max_columns', 10):
+        print(runs.pivot(index='step', columns='scale', values=['seconds', 'rows_per_s', 'peak_mb']).round(4))
+        print(scaling_exponents(runs).round(2))
+
+        limit = interactive_limit(runs)
+        if limit is not None:
+            print(f'Interação da página inicial passa de {INTERACTIVE_BUDGET}s a partir de ~{limit:,.0f} linhas')
+
+        if args.compare:
+            print(compare(runs, args.compare).round(4))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = os.path.join(RESULTS_DIR, f'bench-{datetime.now():%Y%m%d-%H%M%S}.json')
+    with open(output, 'w') as f:
+        json.dump({'timestamp': datetime.now().isoformat(timespec='seconds'), 'revision': git_revision(),
+                   'interactive_limit_rows': limit, 'runs': results}, f, indent=2)
+    print(f'Resultados salvos em {output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Teste de carga da API de consultas (``house_rocket.api``).
+
+Abre ``--concurrency`` conexões keep-alive e envia ``--requests`` consultas
+aleatórias (filtros por status, zipcode, season, faixas de preço/lucro, top-k e
+paginação). Reporta throughput, latências p50/p95/p99/máx e respostas com erro.
+Sem ``--url``, sobe a API num subprocesso numa porta livre.
+
+Uso (a partir da pasta APP):
+    python -m benchmarks.load_test --requests 5000 --concurrency 32
+    python -m benchmarks.load_test --url http://127.0.0.1:8502
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+
+from house_rocket import api, store
+
+SEASONS = ['spring', 'summer', 'fall', 'winter']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def random_query(rng, zipcodes):
+    params = {}
+    if rng.random() < 0.7:
+        params['status'] = 'Buy'
+    if rng.random() < 0.5:
+        params['zipcode'] = ','.join(map(str, rng.sample(zipcodes, rng.randint(1, 3))))
+    if rng.random() < 0.3:
+        params['season'] = rng.choice(SEASONS)
+    if rng.random() < 0.5:
+        params['price_max'] = rng.randrange(200_000, 1_000_000, 50_000)
+    if rng.random() < 0.2:
+        params['profit_min'] = rng.randrange(0, 100_000, 10_000)
+    if rng.random() < 0.8:
+        params['sort'] = rng.choice(['Profit', 'price'])
+    params['limit'] = rng.choice([10, 20, 50, 100])
+    if rng.random() < 0.3:
+        params['offset'] = params['limit'] * rng.randint(1, 5)
+
+    return '/houses?' + urlencode(params)
+
+
+async def request(reader, writer, host, target):
+    writer.write(f'GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode())
+    await writer.drain()
+
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    length = next(int(line.split(':')[1]) for line in lines[1:] if line.lower().startswith('content-length'))
+    body = await reader.readexactly(length)
+
+    return status, body
+
+
+async def client(host, port, targets, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            start = time.perf_counter()
+            status, body = await request(reader, writer, host, target)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append((target, status, body[:200]))
+    finally:
+        writer.close()
+
+
+async def wait_ready(host, port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(0.2)
+            continue
+        status, _ = await request(reader, writer, host, '/health')
+        writer.close()
+        if status == 200:
+            return
+    raise TimeoutError(f'API não respondeu em {timeout}s')
+
+
+async def run(host, port, n_requests, concurrency, seed):
+    await wait_ready(host, port)
+
+    rng = random.Random(seed)
+    zipcodes = sorted(int(zipcode) for zipcode in store.get_dataset(api.DATASET)['zipcode'].unique())
+    targets = [random_query(rng, zipcodes) for _ in range(n_requests)]
+
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, targets[i::concurrency], latencies, errors) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return elapsed, np.array(latencies) * 1000, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='API já em execução (padrão: sobe uma num subprocesso).')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port
+    else:
+        host, port = '127.0.0.1', free_port()
+        server = subprocess.Popen([sys.executable, '-m', api.__name__, '--host', host, '--port', str(port)])
+
+    try:
+        elapsed, latencies, errors = asyncio.run(run(host, port, args.requests, args.concurrency, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(json.dumps({
+        'requests': int(latencies.size),
+        'concurrency': args.concurrency,
+        'seconds': round(elapsed, 3),
+        'requests_per_s': round(latencies.size / elapsed, 1),
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(p95, 3),
+        'p99_ms': round(p99, 3),
+        'max_ms': round(latencies.max(), 3),
+        'errors': len(errors),
+    }, indent=2))
+
+    for target, status, body in errors[:5]:
+        print(status, target, body)
+
+
+if __name__ == '__main__':
+    main()
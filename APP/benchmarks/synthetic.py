@@ -0,0 +1,73 @@
+"""
+Gerador de dados sintéticos no esquema do ``kc_house_data.csv``.
+
+Os imóveis são reamostrados (bootstrap) do dataset original por zipcode, então as
+distribuições de zipcode, estação do ano e preço são mantidas. Cada cópia recebe um
+novo ``id`` e um pequeno ruído em preço, área e coordenadas, para que as medianas
+e os agrupamentos não sejam apenas cópias exatas do original.
+
+Uso (a partir da pasta APP):
+    python -m benchmarks.synthetic --scale 10 --output /tmp/kc_house_data_10x.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SOURCE_PATH = '../kc_house_data.csv'
+
+
+def load_source(filepath=SOURCE_PATH):
+    return pd.read_csv(filepath, dtype={'date': str})
+
+
+def generate(source, scale, seed=42):
+    """
+    Retorna um dataframe com ``scale`` vezes o número de linhas de ``source``.
+
+    :param source: O dataset original (esquema ``kc_house_data``).
+    :type source: DataFrame
+    :param scale: Fator de escala (ex.: 10, 100, 1000).
+    :type scale: int
+    :param seed: Semente do gerador aleatório.
+    :type seed: int
+    """
+    rng = np.random.default_rng(seed)
+    n = source.shape[0] * scale
+
+    # Bootstrap estratificado: cada zipcode recebe ``scale`` vezes os seus imóveis,
+    # sorteados entre os imóveis do próprio zipcode
+    codes, _ = pd.factorize(source['zipcode'])
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    group = np.repeat(np.arange(sizes.size), sizes * scale)
+    positions = order[starts[group] + rng.integers(0, sizes[group])]
+
+    data = source.iloc[rng.permutation(positions)].reset_index(drop=True)
+
+    data['id'] = np.arange(1, n + 1, dtype='int64') * 10 + rng.integers(0, 10, n)
+    data['price'] = np.round(data['price'].to_numpy() * rng.lognormal(0, 0.05, n), -2)
+    data['sqft_living'] = np.maximum(data['sqft_living'].to_numpy() + rng.integers(-50, 51, n), 300)
+    data['sqft_lot'] = np.maximum(data['sqft_lot'].to_numpy() + rng.integers(-100, 101, n), 500)
+    data['lat'] = np.round(data['lat'].to_numpy() + rng.normal(0, 0.002, n), 4)
+    data['long'] = np.round(data['long'].to_numpy() + rng.normal(0, 0.002, n), 3)
+
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', default=SOURCE_PATH)
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    data = generate(load_source(args.source), args.scale, args.seed)
+    data.to_csv(args.output, index=False)
+    print(f'{data.shape[0]} linhas salvas em {args.output}')
+
+
+if __name__ == '__main__':
+    main()
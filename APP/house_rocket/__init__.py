@@ -0,0 +1,3 @@
+"""
+Módulos compartilhados pelo dashboard e pelos jobs offline da House Rocket.
+"""
@@ -0,0 +1,353 @@
+"""
+API HTTP/JSON somente-leitura sobre os imóveis recomendados.
+
+Servidor asyncio (apenas biblioteca padrão) sobre o mesmo dataset do dashboard
+(``store``). As requisições são lidas no event loop e respondidas num pool de
+threads (``run_in_executor``), então uma consulta lenta ou a reconstrução dos
+índices não bloqueia as demais conexões. Os índices ficam em memória: posições por valor de ``status``,
+``zipcode`` e ``season`` e ordenações (``argsort``) de ``price`` e ``Profit``.
+Cada imóvel é serializado em JSON uma única vez; a resposta apenas junta as linhas
+da página pedida. Os índices são reconstruídos quando o dataset muda no store.
+
+Rotas:
+    GET /health
+    GET /houses?status=Buy&zipcode=98001,98002&season=summer&price_max=500000
+               &profit_min=0&sort=Profit&order=desc&limit=10&offset=0
+
+Filtros categóricos aceitam listas separadas por vírgula; ``price_min``/``price_max``
+e ``profit_min``/``profit_max`` são inclusivos. Top-k: ``sort`` + ``limit``.
+
+Uso (a partir da pasta APP):
+    python -m house_rocket.api --port 8502
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from house_rocket import schema, store
+
+DATASET = 'recommended_houses'
+
+CATEGORY_COLS = ['status', 'zipcode', 'season']
+
+# Parâmetro -> (coluna, limite)
+RANGE_PARAMS = {
+    'price_min': ('price', 'min'),
+    'price_max': ('price', 'max'),
+    'profit_min': ('Profit', 'min'),
+    'profit_max': ('Profit', 'max'),
+}
+
+SORT_COLS = {'price': 'price', 'profit': 'Profit'}
+
+DEFAULT_LIMIT = 50
+
+MAX_LIMIT = 1000
+
+MAX_HEADER_BYTES = 16 * 1024
+
+# Corpo máximo aceito (e descartado: a API é somente-leitura)
+MAX_BODY_BYTES = 64 * 1024
+
+# Intervalo (s) entre as verificações de mudança nos arquivos do dataset
+RELOAD_INTERVAL = 1.0
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large'}
+
+
+class QueryError(ValueError):
+    pass
+
+
+class QueryIndex:
+    """
+    Índices em memória de um dataset de imóveis.
+
+    :param data: O dataframe compacto (``store``).
+    :type data: DataFrame
+    :param version: Versão do dataset no store.
+    :type version: str
+    """
+    def __init__(self, data, version=None):
+        self.version = version
+        self.size = data.shape[0]
+
+        self._positions = {}
+        for col in CATEGORY_COLS:
+            codes, uniques = data[col].factorize()
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self._positions[col] = {str(value): order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+        # Ordem crescente, valores ordenados e ordem decrescente (estável nos empates)
+        self._orders = {}
+        for col in set(SORT_COLS.values()):
+            values = data[col].to_numpy(dtype='float64')
+            order = np.argsort(values, kind='stable')
+            self._orders[col] = (order, values[order], np.argsort(-values, kind='stable'))
+
+        records = schema.expand(data).reset_index(drop=True)
+        self._rows = records.to_json(orient='records', lines=True, date_format='iso').splitlines()
+
+    def _category_mask(self, col, values):
+        mask = np.zeros(self.size, dtype=bool)
+        for value in values:
+            positions = self._positions[col].get(value)
+            if positions is not None:
+                mask[positions] = True
+        return mask
+
+    def _range_mask(self, col, lower, upper):
+        order, values, _ = self._orders[col]
+        start = 0 if lower is None else np.searchsorted(values, lower, side='left')
+        stop = self.size if upper is None else np.searchsorted(values, upper, side='right')
+
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[start:stop]] = True
+        return mask
+
+    def query(self, categories=None, ranges=None, sort=None, descending=True, limit=DEFAULT_LIMIT, offset=0):
+        """
+        Retorna (total, posições da página).
+
+        :param categories: Coluna -> lista de valores aceitos.
+        :type categories: dict
+        :param ranges: Coluna -> (mínimo, máximo), ``None`` sem limite.
+        :type ranges: dict
+        :param sort: Coluna de ordenação (``price`` ou ``Profit``); ``None`` mantém a ordem do dataset.
+        :type sort: str
+        """
+        mask = None
+        for col, values in (categories or {}).items():
+            current = self._category_mask(col, values)
+            mask = current if mask is None else mask & current
+        for col, (lower, upper) in (ranges or {}).items():
+            current = self._range_mask(col, lower, upper)
+            mask = current if mask is None else mask & current
+
+        if sort is None:
+            positions = np.arange(self.size) if mask is None else np.flatnonzero(mask)
+        else:
+            order = self._orders[sort][2 if descending else 0]
+            positions = order if mask is None else order[mask[order]]
+
+        return positions.shape[0], positions[offset:offset + limit]
+
+    def rows(self, positions):
+        return '[' + ','.join(self._rows[i] for i in positions) + ']'
+
+
+_lock = threading.Lock()
+_index = None
+_checked = 0.0
+
+
+def get_index():
+    """
+    Retorna o índice do dataset atual, reconstruído quando a versão no store muda.
+    """
+    global _index, _checked
+    if time.monotonic() - _checked > RELOAD_INTERVAL:
+        # get_dataset recarrega o dataset se o arquivo de origem mudou
+        store.get_dataset(DATASET)
+        _checked = time.monotonic()
+
+    version = store.version(DATASET)
+    if _index is None or _index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                _index = QueryIndex(store.get_dataset(DATASET), version)
+
+    return _index
+
+
+def _number(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value[-1])
+    except ValueError:
+        raise QueryError(f'{name} deve ser numérico')
+
+
+def _integer(params, name, default, minimum, maximum):
+    value = params.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value[-1])
+    except ValueError:
+        raise QueryError(f'{name} deve ser inteiro')
+    if not minimum <= value <= maximum:
+        raise QueryError(f'{name} deve estar entre {minimum} e {maximum}')
+
+    return value
+
+
+def parse_query(params):
+    """
+    Converte os parâmetros da URL em argumentos de ``QueryIndex.query``.
+
+    :param params: Resultado de ``parse_qs``.
+    :type params: dict
+    """
+    unknown = set(params) - set(CATEGORY_COLS) - set(RANGE_PARAMS) - {'sort', 'order', 'limit', 'offset'}
+    if unknown:
+        raise QueryError(f'parâmetros desconhecidos: {", ".join(sorted(unknown))}')
+
+    categories = {col: [value for item in params[col] for value in item.split(',') if value]
+                  for col in CATEGORY_COLS if col in params}
+
+    ranges = {}
+    for name, (col, side) in RANGE_PARAMS.items():
+        value = _number(params, name)
+        if value is not None:
+            lower, upper = ranges.get(col, (None, None))
+            ranges[col] = (value, upper) if side == 'min' else (lower, value)
+
+    sort = params.get('sort', [None])[-1]
+    if sort is not None:
+        if sort.lower() not in SORT_COLS:
+            raise QueryError(f'sort deve ser um de: {", ".join(SORT_COLS)}')
+        sort = SORT_COLS[sort.lower()]
+
+    order = params.get('order', ['desc'])[-1]
+    if order not in ('asc', 'desc'):
+        raise QueryError('order deve ser asc ou desc')
+
+    return {
+        'categories': categories,
+        'ranges': ranges,
+        'sort': sort,
+        'descending': order == 'desc',
+        'limit': _integer(params, 'limit', DEFAULT_LIMIT, 0, MAX_LIMIT),
+        'offset': _integer(params, 'offset', 0, 0, np.iinfo('int64').max),
+    }
+
+
+def handle(method, target):
+    """
+    Retorna (status, corpo JSON) de uma requisição.
+    """
+    if method != 'GET':
+        return 405, json.dumps({'error': 'apenas GET'})
+
+    url = urlsplit(target)
+    if url.path == '/health':
+        index = get_index()
+        return 200, json.dumps({'status': 'ok', 'version': index.version, 'rows': index.size})
+
+    if url.path != '/houses':
+        return 404, json.dumps({'error': f'rota desconhecida: {url.path}'})
+
+    try:
+        query = parse_query(parse_qs(url.query))
+    except QueryError as error:
+        return 400, json.dumps({'error': str(error)})
+
+    index = get_index()
+    total, positions = index.query(**query)
+
+    return 200, (f'{{"total": {total}, "offset": {query["offset"]}, "limit": {query["limit"]}, '
+                 f'"items": {index.rows(positions)}}}')
+
+
+def content_length(headers):
+    """
+    Retorna o tamanho do corpo declarado em ``Content-Length``.
+    """
+    value = headers.get('content-length', '') or '0'
+    if not value.isdigit():
+        raise QueryError('Content-Length inválido')
+
+    return int(value)
+
+
+def response(status, body, keep_alive):
+    body = body.encode()
+    headers = (f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+               'Content-Type: application/json; charset=utf-8\r\n'
+               f'Content-Length: {len(body)}\r\n'
+               f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+
+    return headers.encode('latin-1') + body
+
+
+async def serve_connection(reader, writer):
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+
+            lines = head.decode('latin-1').split('\r\n')
+            try:
+                method, target, version = lines[0].split(' ')
+            except ValueError:
+                writer.write(response(400, json.dumps({'error': 'requisição inválida'}), False))
+                break
+
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip().lower()
+
+            # Corpo (ignorado: a API é somente-leitura). Sem um tamanho válido não há como
+            # achar o início da próxima requisição, então a conexão é encerrada
+            try:
+                length = content_length(headers)
+            except QueryError as error:
+                writer.write(response(400, json.dumps({'error': str(error)}), False))
+                break
+            if length > MAX_BODY_BYTES:
+                writer.write(response(413, json.dumps({'error': f'corpo maior que {MAX_BODY_BYTES} bytes'}), False))
+                break
+            if length:
+                try:
+                    await reader.readexactly(length)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+            keep_alive = headers.get('connection', 'keep-alive' if version == 'HTTP/1.1' else 'close') != 'close'
+            status, body = await asyncio.get_running_loop().run_in_executor(None, handle, method, target)
+            writer.write(response(status, body, keep_alive))
+            await writer.drain()
+
+            if not keep_alive:
+                break
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', port=8502):
+    # Monta os índices antes de aceitar conexões
+    get_index()
+    server = await asyncio.start_server(serve_connection, host, port, limit=MAX_HEADER_BYTES)
+    print(f'API em http://{host}:{port} ({get_index().size} imóveis)', flush=True)
+
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
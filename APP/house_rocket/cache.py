@@ -0,0 +1,139 @@
+"""
+Cache colunar (Arrow/Feather) dos CSVs usados pelo dashboard.
+
+O dataframe é salvo já transformado (datetime e category aplicados) em um arquivo
+Feather sem compressão, lido via memory-map. O cache é reconstruído quando o
+mtime/tamanho do CSV muda e o hash SHA-256 do conteúdo também mudou. A chave do
+cache inclui a versão da transformação (código-fonte + ``SCHEMA_VERSION`` do seu
+módulo): mudar ``schema.compact`` gera um cache novo mesmo com o CSV inalterado.
+"""
+import hashlib
+import inspect
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from house_rocket import profiling
+
+CACHE_DIR = '.cache'
+
+
+def file_sha256(filepath, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def cache_paths(filepath, name):
+    folder = os.path.join(os.path.dirname(filepath), CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    if name:
+        stem = f'{stem}.{name}'
+
+    return os.path.join(folder, f'{stem}.feather'), os.path.join(folder, f'{stem}.json')
+
+
+def is_fresh(filepath, meta_path):
+    """
+    Verifica se o cache ainda corresponde ao CSV. Se apenas o mtime mudou (mesmo
+    conteúdo), atualiza os metadados sem reconstruir o cache.
+    """
+    if not os.path.exists(meta_path):
+        return False
+
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    stat = os.stat(filepath)
+    if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return True
+
+    if meta.get('sha256') != file_sha256(filepath):
+        return False
+
+    write_meta(filepath, meta_path, meta['sha256'])
+
+    return True
+
+
+def transform_version(transform):
+    """
+    Retorna o hash do código-fonte da transformação e do ``SCHEMA_VERSION`` do seu
+    módulo (incrementado quando funções auxiliares, ex.: ``features``, mudam).
+    """
+    try:
+        source = inspect.getsource(transform)
+    except (OSError, TypeError):
+        source = getattr(transform, '__qualname__', repr(transform))
+    version = getattr(inspect.getmodule(transform), 'SCHEMA_VERSION', '')
+
+    return hashlib.md5(f'{version}\n{source}'.encode()).hexdigest()[:8]
+
+
+def write_meta(filepath, meta_path, sha256=None):
+    stat = os.stat(filepath)
+    meta = {
+        'source': os.path.basename(filepath),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': sha256 or file_sha256(filepath),
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+
+def build_cache(filepath, cache_path, meta_path, transform=None, **read_csv_kwargs):
+    data = pd.read_csv(filepath, **read_csv_kwargs)
+    if transform is not None:
+        data = transform(data)
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+
+    # Escrita atômica: outro processo nunca lê um arquivo pela metade
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    table = pa.Table.from_pandas(data, preserve_index=True)
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, cache_path)
+
+    write_meta(filepath, meta_path)
+
+
+def read_csv_cached(filepath, transform=None, name=None, **read_csv_kwargs):
+    """
+    Lê um CSV através do cache colunar, reconstruindo-o se necessário.
+
+    :param filepath: Caminho do CSV de origem.
+    :type filepath: str
+    :param transform: Função aplicada ao dataframe antes de salvá-lo no cache.
+    :type transform: callable
+    :param name: Sufixo do arquivo de cache, para diferenciar transformações do mesmo CSV.
+    :type name: str
+    :param read_csv_kwargs: Argumentos repassados ao ``pd.read_csv``.
+    """
+    if name is None and transform is not None:
+        name = transform.__name__
+    if transform is not None:
+        name = f'{name}.{transform_version(transform)}'
+    if read_csv_kwargs:
+        # Mesmo CSV lido com argumentos diferentes gera caches distintos
+        key = json.dumps(read_csv_kwargs, sort_keys=True, default=str)
+        name = '.'.join(filter(None, [name, hashlib.md5(key.encode()).hexdigest()[:8]]))
+
+    cache_path, meta_path = cache_paths(filepath, name)
+
+    fresh = os.path.exists(cache_path) and is_fresh(filepath, meta_path)
+    profiling.cache_event(f'feather:{os.path.basename(cache_path)}', fresh)
+    if not fresh:
+        build_cache(filepath, cache_path, meta_path, transform, **read_csv_kwargs)
+
+    # memory_map + split_blocks permite que colunas numéricas apontem direto
+    # para o arquivo mapeado, sem cópia
+    table = feather.read_table(cache_path, memory_map=True)
+
+    return table.to_pandas(split_blocks=True)
@@ -0,0 +1,307 @@
+"""
+Imóveis comparáveis (comps) por vizinhança, com índice espacial em grade.
+
+Os imóveis são distribuídos numa grade (coordenadas projetadas pela latitude média)
+e ordenados pela célula. O lado das células vem da densidade: é escolhido para que
+um imóvel típico divida a sua célula com cerca de ``TARGET_OCCUPANCY`` imóveis, então
+o trabalho por célula não cresce com o tamanho da base. Para um imóvel, a busca
+percorre blocos de células cada vez maiores ao seu redor até que os k comparáveis
+mais próximos (distância haversine) estejam garantidamente dentro do bloco; os
+candidatos de um bloco são comparados em lotes de até ``CHUNK_PAIRS`` pares.
+Comparáveis são vendas feitas até ``MAX_AGE_DAYS`` dias antes (nunca depois) da
+venda do imóvel, com ``sqft_living`` até ``SQFT_TOLERANCE`` de diferença e
+``grade``/``bedrooms`` a até uma unidade.
+
+``CompsIndex.bulk`` calcula os comps de todos os imóveis, célula por célula
+(O(n log n) para ordenar + trabalho proporcional à densidade local), e
+``CompsIndex.lookup`` responde a consulta de um imóvel (clique no mapa).
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Imóveis por célula vistos por um imóvel típico (média ponderada pelos imóveis)
+TARGET_OCCUPANCY = 48
+
+# Limites do lado das células (km) escolhido pela densidade
+MIN_CELL_KM = 0.05
+
+MAX_CELL_KM = 2.0
+
+# Lado das células (km) da grade em que a densidade é medida
+DENSITY_CELL_KM = 1.0
+
+# Pares (imóvel, candidato) comparados de uma vez
+CHUNK_PAIRS = 1 << 18
+
+# Distância máxima de um comparável
+MAX_DISTANCE_KM = 5.0
+
+K = 5
+
+SQFT_TOLERANCE = 0.2
+
+GRADE_TOLERANCE = 1
+
+BEDROOMS_TOLERANCE = 1
+
+MAX_AGE_DAYS = 365
+
+# Margem entre a distância projetada da grade e a haversine (< 2% em King County)
+SAFETY = 0.95
+
+COMPS_COLS = ['Comps Price', 'Comps Count', 'Comps Distance']
+
+
+def project(lat, long):
+    """
+    Retorna as coordenadas (y, x) em km, projetadas pela latitude média.
+    """
+    y = EARTH_RADIUS_KM * np.radians(lat)
+    x = EARTH_RADIUS_KM * np.radians(long) * np.cos(np.radians(lat.mean()))
+
+    return y, x
+
+
+def cell_size(y, x, occupancy=TARGET_OCCUPANCY):
+    """
+    Retorna o lado das células (km) em que um imóvel típico divide a célula com cerca
+    de ``occupancy`` imóveis. A densidade é medida numa grade de ``DENSITY_CELL_KM``,
+    ponderada pelos imóveis (as regiões densas pesam mais que as vazias).
+    """
+    if y.size == 0:
+        return MAX_CELL_KM
+
+    keys = np.floor((y - y.min()) / DENSITY_CELL_KM).astype('int64') * (1 << 32) \
+        + np.floor((x - x.min()) / DENSITY_CELL_KM).astype('int64')
+    counts = np.unique(keys, return_counts=True)[1]
+    density = (counts.astype('float64') ** 2).sum() / y.size / DENSITY_CELL_KM ** 2
+
+    return float(np.clip(np.sqrt(occupancy / density), MIN_CELL_KM, MAX_CELL_KM))
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Distância (km) entre pontos em graus; aceita arrays com broadcasting.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class CompsIndex:
+    """
+    Índice em grade dos imóveis para a busca de comparáveis.
+
+    :param data: Imóveis com ``id``, ``date``, ``lat``, ``long``, ``price``, ``sqft_living``, ``grade`` e ``bedrooms``.
+        Um ``id`` pode se repetir (revendas); ``lookup`` escolhe a venda pela data.
+    :type data: DataFrame
+    :param cell_km: Lado das células da grade, em km; ``None`` escolhe pela densidade (``cell_size``).
+    :type cell_km: float
+    """
+    def __init__(self, data, cell_km=None):
+        self.data = data
+
+        self._lat = data['lat'].to_numpy(dtype='float64')
+        self._long = data['long'].to_numpy(dtype='float64')
+        self._price = data['price'].to_numpy(dtype='float64')
+        self._sqft = data['sqft_living'].to_numpy(dtype='float64')
+        self._grade = data['grade'].to_numpy(dtype='int64')
+        self._bedrooms = data['bedrooms'].to_numpy(dtype='int64')
+        self._days = data['date'].to_numpy().astype('datetime64[D]').astype('int64')
+        self._ids = data['id'].to_numpy(dtype='int64')
+        self._positions = pd.Series(np.arange(data.shape[0]), index=self._ids)
+
+        y, x = project(self._lat, self._long)
+        self.cell_km = cell_size(y, x) if cell_km is None else cell_km
+        self._rows = np.floor((y - y.min()) / self.cell_km).astype('int64')
+        self._cols = np.floor((x - x.min()) / self.cell_km).astype('int64')
+        self._n_rows = int(self._rows.max()) + 1
+        self._n_cols = int(self._cols.max()) + 1
+
+        keys = self._rows * self._n_cols + self._cols
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+
+    @property
+    def nbytes(self):
+        arrays = [self._lat, self._long, self._price, self._sqft, self._grade, self._bedrooms, self._days, self._ids,
+                  self._rows, self._cols, self._order, self._keys]
+        return sum(array.nbytes for array in arrays) + int(self._positions.memory_usage())
+
+    @property
+    def max_radius(self):
+        # Anéis de células necessários para cobrir MAX_DISTANCE_KM
+        return int(np.ceil(MAX_DISTANCE_KM / (self.cell_km * SAFETY)))
+
+    def _block(self, row, col, radius):
+        # Posições dos imóveis nas células a até ``radius`` anéis de (row, col)
+        rows = np.arange(max(row - radius, 0), min(row + radius, self._n_rows - 1) + 1)
+        first = rows * self._n_cols + max(col - radius, 0)
+        last = rows * self._n_cols + min(col + radius, self._n_cols - 1)
+        starts = np.searchsorted(self._keys, first, side='left')
+        stops = np.searchsorted(self._keys, last, side='right')
+
+        return np.concatenate([self._order[start:stop] for start, stop in zip(starts, stops)])
+
+    def _nearest(self, subjects, candidates, k, max_distance):
+        """
+        Retorna (posições, distâncias) dos k comparáveis mais próximos de cada imóvel em
+        ``subjects`` entre os ``candidates``; -1 / inf onde faltam comparáveis. Os pares são
+        comparados em lotes de até ``CHUNK_PAIRS``, mantendo os k melhores de cada imóvel.
+        """
+        positions = np.full((subjects.shape[0], k), -1, dtype='int64')
+        distances = np.full((subjects.shape[0], k), np.inf)
+
+        step = max(1, min(subjects.shape[0], int(np.sqrt(CHUNK_PAIRS))))
+        size = max(k, CHUNK_PAIRS // step)
+        for first in range(0, subjects.shape[0], step):
+            rows = slice(first, first + step)
+            for start in range(0, candidates.shape[0], size):
+                found, found_distance = self._nearest_chunk(subjects[rows], candidates[start:start + size],
+                                                            k, max_distance)
+                # Os k melhores entre os atuais e os do lote (empates: os já encontrados primeiro)
+                merged = np.concatenate([distances[rows], found_distance], axis=1)
+                order = np.argsort(merged, axis=1, kind='stable')[:, :k]
+                distances[rows] = np.take_along_axis(merged, order, axis=1)
+                positions[rows] = np.take_along_axis(np.concatenate([positions[rows], found], axis=1), order, axis=1)
+
+        return positions, distances
+
+    def _nearest_chunk(self, subjects, candidates, k, max_distance):
+        s, c = subjects[:, None], candidates[None, :]
+        # Apenas vendas anteriores (ou do mesmo dia) à do imóvel, até MAX_AGE_DAYS antes
+        age = self._days[s] - self._days[c]
+        similar = (
+            (np.abs(self._sqft[c] - self._sqft[s]) <= SQFT_TOLERANCE * self._sqft[s])
+            & (np.abs(self._grade[c] - self._grade[s]) <= GRADE_TOLERANCE)
+            & (np.abs(self._bedrooms[c] - self._bedrooms[s]) <= BEDROOMS_TOLERANCE)
+            & (age >= 0) & (age <= MAX_AGE_DAYS)
+            # Outras vendas do mesmo imóvel não são comparáveis
+            & (self._ids[c] != self._ids[s])
+        )
+        distance = haversine(self._lat[s], self._long[s], self._lat[c], self._long[c])
+        distance = np.where(similar & (distance <= max_distance), distance, np.inf)
+
+        positions = np.full((subjects.shape[0], k), -1, dtype='int64')
+        distances = np.full((subjects.shape[0], k), np.inf)
+        n = min(k, candidates.shape[0])
+        if n == 0:
+            return positions, distances
+
+        nearest = np.argpartition(distance, n - 1, axis=1)[:, :n] if n < candidates.shape[0] else \
+            np.broadcast_to(np.arange(n), (subjects.shape[0], n))
+        nearest_distance = np.take_along_axis(distance, nearest, axis=1)
+        order = np.argsort(nearest_distance, axis=1, kind='stable')
+
+        distances[:, :n] = np.take_along_axis(nearest_distance, order, axis=1)
+        positions[:, :n] = np.where(np.isfinite(distances[:, :n]), candidates[np.take_along_axis(nearest, order, axis=1)], -1)
+
+        return positions, distances
+
+    def _search(self, subjects, k):
+        # Imóveis da mesma célula: amplia o bloco até o k-ésimo comp estar garantido
+        row, col = self._rows[subjects[0]], self._cols[subjects[0]]
+        positions = np.full((subjects.shape[0], k), -1, dtype='int64')
+        distances = np.full((subjects.shape[0], k), np.inf)
+
+        pending = np.arange(subjects.shape[0])
+        for radius in range(1, self.max_radius + 1):
+            candidates = self._block(row, col, radius)
+            found, found_distance = self._nearest(subjects[pending], candidates, k, MAX_DISTANCE_KM)
+
+            done = found_distance[:, -1] <= radius * self.cell_km * SAFETY
+            if radius == self.max_radius:
+                done[:] = True
+            positions[pending[done]] = found[done]
+            distances[pending[done]] = found_distance[done]
+
+            pending = pending[~done]
+            if pending.size == 0:
+                break
+
+        return positions, distances
+
+    def bulk(self, k=K):
+        """
+        Retorna (posições, distâncias em km) dos k comparáveis de todos os imóveis
+        (arrays n x k; -1 / inf onde faltam comparáveis).
+        """
+        positions = np.full((self.data.shape[0], k), -1, dtype='int64')
+        distances = np.full((self.data.shape[0], k), np.inf)
+
+        bounds = np.flatnonzero(np.diff(self._keys)) + 1
+        for subjects in np.split(self._order, bounds):
+            positions[subjects], distances[subjects] = self._search(subjects, k)
+
+        return positions, distances
+
+    def lookup(self, house_id, k=K, date=None):
+        """
+        Retorna os k comparáveis de uma venda, do mais próximo ao mais distante, com a
+        distância em ``distance_km``.
+
+        :param house_id: ``id`` do imóvel.
+        :type house_id: int
+        :param k: Quantidade de comparáveis.
+        :type k: int
+        :param date: Data da venda, quando o ``id`` tem mais de uma; ``None`` usa a mais recente
+            (a regra de duplicados do pipeline).
+        :type date: str or Timestamp
+        """
+        matches = self._positions.loc[[house_id]].to_numpy()
+        if date is not None:
+            matches = matches[self._days[matches] == np.datetime64(pd.Timestamp(date), 'D').astype('int64')]
+            if matches.size == 0:
+                raise KeyError((house_id, date))
+        # Mesma data: vale a venda que aparece depois, como no pipeline
+        position = matches[::-1][np.argmax(self._days[matches[::-1]])]
+
+        positions, distances = self._search(np.array([position]), k)
+        found = positions[0] >= 0
+
+        comps = self.data.iloc[positions[0][found]].copy()
+        comps.insert(0, 'distance_km', distances[0][found])
+
+        return comps
+
+    def summarize(self, positions, distances):
+        """
+        Retorna, por imóvel: preço estimado pelos comps (mediana do preço por sqft dos comps x
+        sqft do imóvel), quantidade de comps e distância média (km).
+        """
+        found = positions >= 0
+        price_sqft = np.where(found, self._price[positions] / self._sqft[positions], np.nan)
+
+        with warnings.catch_warnings():
+            # Imóveis sem comps: mediana e média de linhas só com NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            median_price_sqft = np.nanmedian(price_sqft, axis=1)
+            mean_distance = np.nanmean(np.where(found, distances, np.nan), axis=1)
+
+        return pd.DataFrame({
+            'Comps Price': median_price_sqft * self._sqft,
+            'Comps Count': found.sum(axis=1),
+            'Comps Distance': mean_distance,
+        }, index=self.data.index)
+
+
+def add_comps(data, k=K):
+    """
+    Adiciona ao dataframe as colunas ``COMPS_COLS`` calculadas com ``CompsIndex.bulk``.
+
+    :param data: O dataframe de imóveis.
+    :type data: DataFrame
+    :param k: Comparáveis por imóvel.
+    :type k: int
+    """
+    index = CompsIndex(data)
+    summary = index.summarize(*index.bulk(k))
+    for col in COMPS_COLS:
+        data[col] = summary[col]
+
+    return data
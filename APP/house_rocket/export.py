@@ -0,0 +1,154 @@
+"""
+Exportação dos dataframes do dashboard (CSV, Excel, JSON e Parquet).
+
+Os arquivos são escritos em disco em blocos de ``CHUNK_SIZE`` linhas, então a
+memória usada na escrita não cresce com o tamanho do portfólio. Ao servir o
+download, o Streamlit ainda lê o arquivo inteiro para a memória. Cada exportação é guardada
+em cache pela chave do estado dos filtros (nome do dataset, versão, filtros,
+colunas e formato), sem precisar calcular o hash do dataframe inteiro. Como as
+versões do store são contadores do processo, cada processo exporta para a sua
+própria pasta temporária (``tempfile.mkdtemp``), removida quando ele termina.
+"""
+import atexit
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'json': 'application/json',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+CHUNK_SIZE = 50_000
+
+EXCEL_MAX_ROWS = 1_048_575
+
+EXPORT_PREFIX = 'house_rocket_exports_'
+
+MAX_CACHED_EXPORTS = 32
+
+_lock = threading.Lock()
+_exports = OrderedDict()
+_export_dir = None
+
+
+def iter_chunks(df, chunk_size=CHUNK_SIZE):
+    for start in range(0, max(df.shape[0], 1), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def write_csv(df, filepath, chunk_size=CHUNK_SIZE):
+    with open(filepath, 'w', newline='') as f:
+        for i, chunk in enumerate(iter_chunks(df, chunk_size)):
+            chunk.to_csv(f, header=(i == 0))
+
+
+def write_json(df, filepath, chunk_size=CHUNK_SIZE):
+    # Um único array JSON: os registros de cada bloco são escritos sem os colchetes
+    with open(filepath, 'w') as f:
+        f.write('[')
+        first = True
+        for chunk in iter_chunks(df, chunk_size):
+            if chunk.shape[0]:
+                if not first:
+                    f.write(',')
+                f.write(chunk.to_json(orient='records', date_format='iso')[1:-1])
+                first = False
+        f.write(']')
+
+
+def write_parquet(df, filepath, chunk_size=CHUNK_SIZE):
+    schema = pa.Schema.from_pandas(df, preserve_index=True)
+    with pq.ParquetWriter(filepath, schema) as writer:
+        for chunk in iter_chunks(df, chunk_size):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=True))
+
+
+def write_xlsx(df, filepath, chunk_size=CHUNK_SIZE):
+    if df.shape[0] > EXCEL_MAX_ROWS:
+        raise ValueError(f'O Excel suporta no máximo {EXCEL_MAX_ROWS} linhas; use CSV ou Parquet.')
+
+    # constant_memory: cada linha é gravada no disco assim que a próxima começa
+    workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True, 'nan_inf_to_errors': True})
+    sheet = workbook.add_worksheet()
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+
+    sheet.write_row(0, 0, [df.index.name or ''] + [str(col) for col in df.columns])
+    for i, dtype in enumerate(df.dtypes, start=1):
+        if dtype.kind == 'M':
+            sheet.set_column(i, i, 12, date_format)
+
+    row_number = 1
+    for chunk in iter_chunks(df, chunk_size):
+        for row in chunk.reset_index().astype(object).to_numpy().tolist():
+            sheet.write_row(row_number, 0, row)
+            row_number += 1
+    workbook.close()
+
+
+def export_dir():
+    """
+    Retorna a pasta de exportação deste processo, criada no primeiro uso.
+    """
+    global _export_dir
+    with _lock:
+        if _export_dir is None or not os.path.isdir(_export_dir):
+            _export_dir = tempfile.mkdtemp(prefix=EXPORT_PREFIX)
+            atexit.register(shutil.rmtree, _export_dir, ignore_errors=True)
+
+        return _export_dir
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+    'json': write_json,
+    'parquet': write_parquet,
+}
+
+
+def export_key(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def export(df, fmt, key):
+    """
+    Retorna o caminho do arquivo exportado, reaproveitando exportações anteriores
+    com a mesma chave.
+
+    :param df: O dataframe a ser exportado.
+    :type df: DataFrame
+    :param fmt: Um dos formatos de ``FORMATS``.
+    :type fmt: str
+    :param key: Chave barata do estado que gerou ``df`` (ex.: ``export_key(versão, filtros, colunas)``).
+    :type key: str
+    """
+    cache_key = (key, fmt)
+    with _lock:
+        if cache_key in _exports and os.path.exists(_exports[cache_key]):
+            _exports.move_to_end(cache_key)
+            return _exports[cache_key]
+
+    filepath = os.path.join(export_dir(), f'{key}.{fmt}')
+    tmp_path = f'{filepath}.{threading.get_ident()}.tmp'
+    WRITERS[fmt](df, tmp_path)
+    os.replace(tmp_path, filepath)
+
+    with _lock:
+        _exports[cache_key] = filepath
+        while len(_exports) > MAX_CACHED_EXPORTS:
+            _, old_path = _exports.popitem(last=False)
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
+    return filepath
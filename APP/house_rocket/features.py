@@ -0,0 +1,115 @@
+"""
+Criação das variáveis derivadas do portfólio de imóveis.
+
+Todas as funções operam coluna a coluna (numpy/pandas vetorizado), substituindo
+os ``apply(..., axis=1)`` usados no notebook e em ``data_transform``.
+"""
+import numpy as np
+import pandas as pd
+
+SEASONS = ['spring', 'summer', 'fall', 'winter']
+
+# Mês -> estação do ano (mesmos intervalos de datas usados no notebook)
+_MONTH_TO_SEASON = np.array(['winter',                      # índice 0 não é usado
+                             'winter', 'winter',
+                             'spring', 'spring', 'spring',
+                             'summer', 'summer', 'summer',
+                             'fall', 'fall', 'fall',
+                             'winter'], dtype=object)
+
+
+def season_from_date(dates):
+    """
+    Retorna a estação do ano de cada data.
+
+    :param dates: Datas das vendas.
+    :type dates: Series
+    """
+    months = pd.to_datetime(dates).dt.month.to_numpy()
+
+    return pd.Series(_MONTH_TO_SEASON[months], index=dates.index, name='season')
+
+
+def add_date_features(data):
+    """
+    Cria as variáveis ``week``, ``month``, ``year`` e ``season`` a partir de ``date``.
+
+    :param data: O dataframe com a coluna ``date`` já convertida para datetime.
+    :type data: DataFrame
+    """
+    date = data['date'].dt
+    data['week'] = date.isocalendar().week.astype('int64')
+    data['month'] = date.month
+    data['year'] = date.year
+    data['season'] = season_from_date(data['date'])
+
+    return data
+
+
+def add_house_features(data):
+    """
+    Cria as variáveis ``has_basement``, ``new_house`` e ``valor_m2``.
+
+    :param data: O dataframe do portfólio.
+    :type data: DataFrame
+    """
+    data['has_basement'] = (data['sqft_basement'].to_numpy() != 0).astype('int64')
+    data['new_house'] = (data['yr_built'].to_numpy() < 1955).astype('int64')
+    data['valor_m2'] = add_valor_m2(data)
+
+    return data
+
+
+def add_valor_m2(data):
+    """
+    Retorna o preço por unidade de área total (``price / sqft_lot``).
+
+    :param data: O dataframe do portfólio.
+    :type data: DataFrame
+    """
+    return pd.Series(data['price'].to_numpy(dtype='float64') / data['sqft_lot'].to_numpy(dtype='float64'),
+                     index=data.index, name='valor_m2')
+
+
+def buy_status(price, median_price, condition):
+    """
+    Retorna 'Buy' para imóveis abaixo da mediana da região e em condição 3, senão 'Not Buy'.
+
+    :param price: Preço de cada imóvel.
+    :param median_price: Mediana de preço da região de cada imóvel (alinhada com ``price``).
+    :param condition: Condição de cada imóvel.
+    """
+    buy = (np.asarray(price) < np.asarray(median_price)) & (np.asarray(condition).astype('int64') == 3)
+
+    return np.where(buy, 'Buy', 'Not Buy').astype(object)
+
+
+def sell_price(price, median_price):
+    """
+    Retorna o preço de venda: 30% acima do preço de compra quando abaixo da mediana
+    da região/estação, senão 10% acima.
+
+    :param price: Preço de compra de cada imóvel.
+    :param median_price: Mediana de preço da região/estação de cada imóvel.
+    """
+    price = np.asarray(price, dtype='float64')
+
+    return np.where(price < np.asarray(median_price), price * 1.3, price * 1.1)
+
+
+def add_sell_features(data, median_price):
+    """
+    Cria as colunas ``Sell Price`` e ``Profit``. Imóveis com status 'Not Buy' ficam com 0.
+
+    :param data: O dataframe com a coluna ``status``.
+    :type data: DataFrame
+    :param median_price: Mediana de preço por (zipcode, season), alinhada com ``data``.
+    """
+    buy = data['status'].to_numpy() == 'Buy'
+    price = data['price'].to_numpy(dtype='float64')
+
+    sell = np.where(buy, sell_price(price, median_price), 0.0)
+    data['Sell Price'] = sell
+    data['Profit'] = np.where(buy, sell - price, 0.0)
+
+    return data
@@ -0,0 +1,81 @@
+"""
+Cache dos gráficos plotly das páginas do dashboard.
+
+Cada gráfico é guardado pela chave (id do gráfico, versão do dataset, estado dos
+filtros). Num acerto, a agregação pandas e a construção da figura são puladas e a
+figura já validada é reenviada ao Streamlit. O cache é compartilhado por todas as
+sessões do processo, com descarte LRU e teto de tamanho medido pelo JSON serializado
+de cada figura.
+
+As figuras em cache não devem ser alteradas depois de ``plotly_chart``.
+"""
+import os
+import threading
+
+from collections import OrderedDict
+
+from house_rocket import profiling
+
+MAX_CACHED_FIGURES = 128
+
+MAX_CACHE_MB = float(os.environ.get('HOUSE_ROCKET_FIGURE_CACHE_MB', 64))
+
+_lock = threading.Lock()
+_figures = OrderedDict()
+
+
+def _evict():
+    limit = MAX_CACHE_MB * 1024 ** 2
+    while _figures and (len(_figures) > MAX_CACHED_FIGURES or sum(size for _, size in _figures.values()) > limit):
+        _figures.popitem(last=False)
+
+
+def get_figure(chart, key, build):
+    """
+    Retorna a figura do cache ou a constrói com ``build()`` e a guarda.
+
+    :param chart: Id do gráfico (também usado no profiling).
+    :type chart: str
+    :param key: Versão do dataset e estado dos filtros (imutável, ex.: ``filters.freeze``).
+    :type key: tuple
+    :param build: Função sem argumentos que agrega os dados e retorna a figura.
+    :type build: callable
+    """
+    key = (chart, key)
+    with _lock:
+        entry = _figures.get(key)
+        if entry is not None:
+            _figures.move_to_end(key)
+
+    profiling.cache_event(f'figura:{chart}', entry is not None)
+    if entry is not None:
+        return entry[0]
+
+    fig = build()
+    size = len(fig.to_json())
+
+    with _lock:
+        _figures[key] = (fig, size)
+        _evict()
+
+    return fig
+
+
+def plotly_chart(container, chart, key, build, **kwargs):
+    """
+    ``profiling.plotly_chart`` com a figura vinda de ``get_figure``.
+    """
+    return profiling.plotly_chart(container, chart, get_figure(chart, key, build), **kwargs)
+
+
+def memory_usage():
+    """
+    Retorna o tamanho (em bytes) do JSON de cada figura em cache.
+    """
+    with _lock:
+        return {key: size for key, (_, size) in _figures.items()}
+
+
+def clear():
+    with _lock:
+        _figures.clear()
@@ -0,0 +1,173 @@
+"""
+Motor de filtros da barra lateral da página inicial.
+
+Os índices são construídos uma vez por dataset: colunas de intervalo (preço, ano,
+data) ficam ordenadas (``argsort``) e colunas categóricas viram bitmaps compactados
+(``np.packbits``), um por valor. Cada filtro vira um bitmap, que é guardado em cache;
+a combinação é feita com ``&`` sobre os bitmaps e o dataframe só é recortado uma
+vez no final. Quando apenas um widget muda, os bitmaps dos demais são reaproveitados.
+"""
+import threading
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import schema
+
+RANGE_COLS = ['price', 'yr_built', 'date']
+
+CATEGORY_COLS = ['status', 'zipcode', 'season', 'waterfront', 'has_basement', 'renovated']
+
+MAX_CACHED_MASKS = 256
+
+MAX_CACHED_RESULTS = 16
+
+
+def freeze(filters):
+    """
+    Converte o estado dos filtros em uma chave imutável (usada nos caches).
+
+    :param filters: Dicionário coluna -> limite superior (intervalo) ou lista de valores (categoria).
+    :type filters: dict
+    """
+    key = []
+    for col, value in sorted(filters.items()):
+        if isinstance(value, (list, tuple, set, np.ndarray)):
+            value = tuple(sorted(value, key=str))
+        key.append((col, value))
+
+    return tuple(key)
+
+
+class FilterEngine:
+    """
+    Índices ordenados e bitmaps das colunas filtráveis de um dataframe.
+
+    :param data: O dataframe a ser filtrado (não é alterado).
+    :type data: DataFrame
+    """
+    def __init__(self, data, range_cols=RANGE_COLS, category_cols=CATEGORY_COLS):
+        self.data = data
+        self.n = data.shape[0]
+        self._lock = threading.Lock()
+        self._masks = OrderedDict()
+        self._results = OrderedDict()
+
+        columns = {col: data[col] for col in data.columns}
+        if 'flags' in data.columns:
+            columns.update(schema.unpack_flags(data))
+        else:
+            columns['renovated'] = data['yr_renovated'] > 0
+
+        self._values = {}
+        self._sorted = {}
+        for col in range_cols:
+            values = columns[col].to_numpy()
+            order = np.argsort(values, kind='stable')
+            self._values[col] = values
+            self._sorted[col] = (order, values[order])
+
+        self._bitmaps = {}
+        for col in category_cols:
+            codes, uniques = pd.factorize(columns[col])
+            self._values[col] = columns[col].to_numpy()
+            self._bitmaps[col] = {value: np.packbits(codes == i) for i, value in enumerate(uniques)}
+
+        self._all = np.packbits(np.ones(self.n, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+    @property
+    def nbytes(self):
+        total = sum(order.nbytes + values.nbytes for order, values in self._sorted.values())
+        total += sum(bitmap.nbytes for bitmaps in self._bitmaps.values() for bitmap in bitmaps.values())
+
+        return total
+
+    def _range_mask(self, col, upper):
+        order, values = self._sorted[col]
+        stop = np.searchsorted(values, np.asarray(upper).astype(values.dtype), side='right')
+        mask = np.zeros(self.n, dtype=bool)
+        mask[order[:stop]] = True
+
+        return np.packbits(mask)
+
+    def _category_mask(self, col, values):
+        bitmaps = self._bitmaps[col]
+        mask = self._none.copy()
+        for value in values:
+            mask |= bitmaps.get(value, self._none)
+
+        return mask
+
+    def _column_mask(self, col, value):
+        key = freeze({col: value})
+        with self._lock:
+            if key in self._masks:
+                self._masks.move_to_end(key)
+                return self._masks[key]
+
+        if col in self._bitmaps:
+            mask = self._category_mask(col, value)
+        else:
+            mask = self._range_mask(col, value)
+
+        with self._lock:
+            self._masks[key] = mask
+            if len(self._masks) > MAX_CACHED_MASKS:
+                self._masks.popitem(last=False)
+
+        return mask
+
+    def mask(self, filters):
+        """
+        Retorna o bitmap compactado das linhas que passam em todos os filtros.
+
+        :param filters: Dicionário coluna -> limite superior (intervalo) ou lista de valores (categoria).
+        :type filters: dict
+        """
+        mask = self._all
+        for col, value in filters.items():
+            mask = mask & self._column_mask(col, value)
+
+        return mask
+
+    def positions(self, filters):
+        return np.flatnonzero(np.unpackbits(self.mask(filters), count=self.n))
+
+    def bounds(self, col, filters):
+        """
+        Retorna (mínimo, máximo) de ``col`` entre as linhas que passam nos filtros.
+        """
+        values = self._values[col][self.positions(filters)]
+        if values.size == 0:
+            values = self._values[col]
+
+        return values.min(), values.max()
+
+    def unique(self, col, filters):
+        return pd.unique(self._values[col][self.positions(filters)])
+
+    def apply(self, filters):
+        """
+        Retorna o dataframe filtrado, recortado uma única vez. O resultado de cada
+        combinação de filtros é guardado em cache.
+
+        :param filters: Dicionário coluna -> limite superior (intervalo) ou lista de valores (categoria).
+        :type filters: dict
+        """
+        key = freeze(filters)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        result = self.data.iloc[self.positions(filters)]
+
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > MAX_CACHED_RESULTS:
+                self._results.popitem(last=False)
+
+        return result
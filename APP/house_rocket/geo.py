@@ -0,0 +1,171 @@
+"""
+Geometrias dos zipcodes de King County usadas no mapa de preço por região.
+
+O dashboard lê apenas o arquivo local ``data/zipcodes.parquet`` (GeoParquet
+versionado no repositório) e nunca acessa a rede. O arquivo versionado contém
+regiões aproximadas, geradas a partir das coordenadas dos imóveis (células de
+Voronoi dos imóveis unidas por zipcode). Para usar as fronteiras oficiais, gere-o
+a partir do GeoJSON de King County: as geometrias são simplificadas preservando
+as fronteiras compartilhadas entre zipcodes vizinhos e filtradas para os zipcodes
+do dataset. A origem das geometrias fica na coluna ``SOURCE`` e o mapa avisa quando
+as regiões são aproximadas. O preço médio por região é calculado a partir dos imóveis recomendados
+atuais (``zip_price_table``), não é salvo junto com as geometrias.
+
+Uso (a partir da pasta APP):
+    python -m house_rocket.geo                                  # regiões aproximadas
+    python -m house_rocket.geo --source <url ou arquivo .geojson>
+"""
+import argparse
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import lazy
+
+# Importados apenas quando as geometrias são lidas ou geradas
+geopandas = lazy.lazy_import('geopandas')
+shapely = lazy.lazy_import('shapely')
+
+ZIPCODES_URL = "https://opendata.arcgis.com/datasets/83fc2e72903343aabff6de8cb445b81c_2.geojson"
+
+ZIPCODES_PATH = 'data/zipcodes.parquet'
+
+# Tolerância da simplificação, em graus (~50 m)
+SIMPLIFY_TOLERANCE = 0.0005
+
+# Folga (graus, ~500 m) em torno dos imóveis nas regiões aproximadas
+APPROXIMATE_MARGIN = 0.005
+
+# Valor da coluna SOURCE das regiões aproximadas
+APPROXIMATE_SOURCE = 'aproximado'
+
+
+def simplify(geometry, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    Simplifica os polígonos mantendo as fronteiras entre zipcodes vizinhos coincidentes.
+
+    :param geometry: Polígonos dos zipcodes.
+    :type geometry: GeoSeries
+    :param tolerance: Tolerância da simplificação, em graus.
+    :type tolerance: float
+    """
+    if hasattr(shapely, 'coverage_simplify'):
+        simplified = shapely.coverage_simplify(geometry.to_numpy(), tolerance)
+        return geopandas.GeoSeries(simplified, index=geometry.index, crs=geometry.crs)
+
+    return geometry.simplify(tolerance, preserve_topology=True)
+
+
+def zip_price_table(data):
+    """
+    Retorna a quantidade e o preço médio dos imóveis por zipcode.
+
+    :param data: Imóveis recomendados para compra.
+    :type data: DataFrame
+    """
+    table = data.groupby('zipcode', observed=True)['price'].agg(['count', 'mean'])
+
+    return table.rename(columns={'count': 'COUNT', 'mean': 'PRICE'})
+
+
+def approximate_zipcodes(data, margin=APPROXIMATE_MARGIN):
+    """
+    Retorna regiões aproximadas dos zipcodes: a célula de Voronoi de cada imóvel,
+    unida às dos demais imóveis do mesmo zipcode e recortada pela área ocupada pelos
+    imóveis (envoltória côncava com ``margin`` graus de folga).
+
+    :param data: Imóveis com ``lat``, ``long`` e ``zipcode``.
+    :type data: DataFrame
+    """
+    houses = data[['long', 'lat', 'zipcode']].drop_duplicates(['long', 'lat'])
+    points = shapely.multipoints(shapely.points(houses['long'].to_numpy(), houses['lat'].to_numpy()))
+    area = shapely.buffer(shapely.concave_hull(points, ratio=0.05), margin)
+
+    cells = shapely.get_parts(shapely.voronoi_polygons(points, extend_to=area, ordered=True))
+    geofile = geopandas.GeoDataFrame({'ZIP': houses['zipcode'].astype('int64').to_numpy()},
+                                     geometry=shapely.intersection(cells, area), crs='EPSG:4326')
+
+    return geofile.dissolve('ZIP').reset_index()
+
+
+def build_zipcodes(source, data, output=ZIPCODES_PATH, tolerance=SIMPLIFY_TOLERANCE):
+    """
+    Gera o arquivo local de geometrias dos zipcodes.
+
+    :param source: URL ou caminho do GeoJSON de zipcodes de King County; ``None`` gera as regiões aproximadas.
+    :type source: str
+    :param data: Imóveis do dataset (``recommended_houses``).
+    :type data: DataFrame
+    """
+    if source is None:
+        geofile = approximate_zipcodes(data)
+    else:
+        geofile = geopandas.read_file(source)[['ZIP', 'geometry']]
+        geofile['ZIP'] = geofile['ZIP'].astype('int64')
+        geofile = geofile[geofile['ZIP'].isin(data['zipcode'].unique())].reset_index(drop=True)
+    geofile['geometry'] = simplify(geofile.geometry, tolerance)
+    geofile.insert(1, 'SOURCE', APPROXIMATE_SOURCE if source is None else os.path.basename(source))
+
+    geofile.to_parquet(output)
+
+    return geofile
+
+
+def get_zipcodes(path=ZIPCODES_PATH):
+    """
+    Lê as geometrias locais; retorna None se o arquivo não existir (o store o relê
+    quando ele for gerado).
+    """
+    if not os.path.exists(path):
+        warnings.warn(f'{path} não encontrado. Gere com: python -m house_rocket.geo')
+        return None
+
+    return geopandas.read_parquet(path)
+
+
+def is_approximate(geofile):
+    """
+    Indica se as geometrias são as regiões aproximadas (arquivos sem a coluna ``SOURCE``
+    são de versões anteriores, que só geravam regiões aproximadas).
+    """
+    return 'SOURCE' not in geofile.columns or bool((geofile['SOURCE'] == APPROXIMATE_SOURCE).any())
+
+
+def region_prices(df, prices):
+    """
+    Retorna o preço médio por zipcode (colunas ZIP e PRICE) para o mapa de regiões.
+    Usa a tabela pré-calculada quando ``df`` contém todos os imóveis recomendados.
+
+    :param df: Imóveis recomendados exibidos no mapa.
+    :type df: DataFrame
+    :param prices: ``zip_price_table`` da mesma versão do dataset de ``df``.
+    :type prices: DataFrame
+    """
+    # Os filtros só removem imóveis: mesma quantidade significa o mesmo conjunto
+    if prices['COUNT'].sum() == df.shape[0]:
+        return pd.DataFrame({'ZIP': prices.index.to_numpy().astype('int64'), 'PRICE': prices['PRICE'].to_numpy()})
+
+    codes, uniques = pd.factorize(df['zipcode'])
+    total = np.bincount(codes, weights=df['price'].to_numpy(dtype='float64'))
+    count = np.bincount(codes)
+
+    return pd.DataFrame({'ZIP': np.asarray(uniques).astype('int64'), 'PRICE': total / count})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--source', help=f'GeoJSON oficial (ex.: {ZIPCODES_URL}); padrão: regiões aproximadas.')
+    parser.add_argument('--output', default=ZIPCODES_PATH)
+    parser.add_argument('--tolerance', type=float, default=SIMPLIFY_TOLERANCE)
+    args = parser.parse_args()
+
+    from house_rocket import store
+
+    geofile = build_zipcodes(args.source, store.get_dataset('recommended_houses'), args.output, args.tolerance)
+    print(f'{geofile.shape[0]} zipcodes salvos em {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Atualização incremental das saídas do pipeline quando chegam novas vendas.
+
+As novas vendas passam pelos mesmos limites de outliers da última execução completa
+(salvos em ``pipeline_state.json``) e pela regra de duplicados do README: para cada
+``id`` vale a venda mais recente. Apenas os zipcodes afetados (novas vendas e vendas
+substituídas) têm as medianas recalculadas e as linhas pontuadas novamente; os
+demais imóveis e linhas dos relatórios são mantidos como estão.
+
+Se as saídas têm as colunas de comps (``--comps``), elas são recalculadas para todos os
+imóveis, já que a vizinhança de um imóvel atravessa os limites dos zipcodes.
+
+Os limites de outliers ficam fixos entre execuções completas. Rode o pipeline
+completo periodicamente para recalculá-los.
+
+Uso (a partir da pasta APP):
+    python -m house_rocket.incremental --input novas_vendas.csv --output data
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import comps, features, pipeline
+
+SCORE_COLS = ['status', 'Sell Price', 'Profit']
+
+
+def load_outputs(output):
+    # round_trip: as linhas mantidas são regravadas com os mesmos valores
+    read = dict(index_col=0, float_precision='round_trip')
+    data = pd.read_csv(os.path.join(output, 'recommended_houses.csv'), parse_dates=['date'], **read)
+    report1 = pd.read_csv(os.path.join(output, 'report1.csv'), parse_dates=['date'], **read)
+    report2 = pd.read_csv(os.path.join(output, 'report2.csv'), **read)
+
+    return data, report1, report2
+
+
+def prepare_sales(sales, bounds, columns):
+    """
+    Aplica às novas vendas a limpeza do pipeline com os limites de outliers salvos.
+
+    :param sales: Novas vendas, no esquema do ``kc_house_data.csv`` (``date`` já convertida).
+    :type sales: DataFrame
+    :param bounds: Limites de outliers da última execução completa.
+    :type bounds: dict
+    :param columns: Tipos das colunas das saídas atuais.
+    :type columns: Series
+    """
+    sales = sales.loc[pipeline.outlier_mask(sales, bounds)]
+    sales = sales.sort_values('date', kind='stable').drop_duplicates('id', keep='last').sort_index()
+    sales = sales.drop(columns=pipeline.DROP_COLS, errors='ignore').reset_index(drop=True)
+    sales = features.add_house_features(sales)
+    sales = features.add_date_features(sales).drop(columns=['valor_m2'])
+
+    common = [col for col in sales.columns if col in columns.index]
+
+    return sales.astype(columns[common].to_dict())
+
+
+def apply_sales(data, sales):
+    """
+    Remove as vendas substituídas e anexa as novas, na mesma ordem de uma execução completa.
+    Retorna (dados, posição nova de cada índice antigo, zipcodes afetados).
+    """
+    current = data.set_index('id')['date'].reindex(sales['id'])
+
+    # Mesma regra do pipeline: em empate de data vale a venda que aparece depois
+    sales = sales.loc[~(current.to_numpy() > sales['date'].to_numpy())]
+    replaced = data['id'].isin(sales['id']).to_numpy()
+
+    affected = np.union1d(sales['zipcode'].unique(), data.loc[replaced, 'zipcode'].unique())
+
+    kept = data.loc[~replaced]
+    positions = pd.Series(np.arange(kept.shape[0]), index=kept.index)
+    data = pd.concat([kept, sales], ignore_index=True)
+
+    return data, positions, affected
+
+
+def patch_medians(medians, partial, affected):
+    patched = {}
+    for key, values in medians.items():
+        zipcodes = values.index.get_level_values('zipcode')
+        patched[key] = pd.concat([values.loc[~zipcodes.isin(affected)], partial[key]]).sort_index()
+
+    return patched
+
+
+def patch_report(report, new, positions, zipcode_col, affected):
+    kept = report.loc[~report[zipcode_col].isin(affected)].copy()
+    kept.index = positions.reindex(kept.index).to_numpy()
+
+    return pd.concat([kept, new]).sort_index(kind='stable')
+
+
+def update(filepath, output='data'):
+    """
+    Atualiza ``recommended_houses.csv``, ``report1.csv``, ``report2.csv``, ``insights.json``
+    e o estado do pipeline com as vendas de ``filepath``.
+
+    :param filepath: CSV com as novas vendas (esquema do ``kc_house_data.csv``).
+    :type filepath: str
+    :param output: Pasta das saídas do pipeline.
+    :type output: str
+    """
+    start = time.perf_counter()
+    state = pipeline.load_state(output)
+    data, report1, report2 = load_outputs(output)
+
+    sales = prepare_sales(pipeline.ingest(filepath), state['outlier_bounds'], data.dtypes)
+    data, positions, affected = apply_sales(data, sales)
+
+    # Medianas e score apenas dos zipcodes afetados
+    rows = data['zipcode'].isin(affected).to_numpy()
+    partial = data.loc[rows, data.columns.difference(SCORE_COLS, sort=False)]
+    medians = pipeline.compute_medians(partial)
+    partial = pipeline.score(partial, medians)
+    data.loc[rows, SCORE_COLS] = partial[SCORE_COLS]
+    new_report1, new_report2 = pipeline.build_reports(partial, medians)
+
+    report1 = patch_report(report1, new_report1, positions, 'zipcode', affected)
+    report2 = patch_report(report2, new_report2, positions, 'Region', affected)
+    medians = patch_medians(state['medians'], medians, affected)
+
+    if state['comps_k']:
+        data = comps.add_comps(data, state['comps_k'])
+
+    data['valor_m2'] = features.add_valor_m2(data)
+    pipeline.write_outputs(output, data, report1, report2)
+    pipeline.save_state(output, state['outlier_bounds'], medians, state['comps_k'])
+
+    print(f'{sales.shape[0]} vendas | {len(affected)} zipcodes atualizados | {data.shape[0]} imóveis | '
+          f'{report1.shape[0]} recomendados para compra | {time.perf_counter() - start:.3f}s')
+
+    return affected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', required=True, help='CSV com as novas vendas.')
+    parser.add_argument('--output', default='data')
+    args = parser.parse_args()
+
+    update(args.input, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Resumo pré-calculado das hipóteses de negócio (H1-H10) da página de Insights.
+
+O resumo é gerado uma vez, no pipeline, e salvo em ``data/insights.json``: médias
+agrupadas, quartis dos box plots, coeficientes da regressão de H7, os percentuais
+citados nos textos e o veredito de cada hipótese (percentual afirmado x resultado). A página apenas lê esse arquivo, então o custo de renderização
+não depende do tamanho do dataset.
+"""
+import json
+import os
+
+import numpy as np
+
+from house_rocket import stats
+from house_rocket.stats import consecutive_percentage, diff_mean, mean_growth
+
+INSIGHTS_PATH = 'data/insights.json'
+
+# Percentual afirmado por cada hipótese, na mesma medida de ``results`` (em h2, quanto
+# os imóveis antigos são mais caros: a hipótese diz que são 50% mais baratos)
+CLAIMS = {
+    'h1': 20,
+    'h2': -50,
+    'h3': 40,
+    'h4': 10,
+    'h5': 15,
+    'h6': 10,
+    'h7': 20,
+    'h8': 40,
+    'h9': 25,
+    'h10': 0.1,
+}
+
+# Diferença máxima entre o resultado e o percentual afirmado, relativa a ele, para a hipótese ser válida
+TOLERANCE = 0.1
+
+
+def verdict(result, claim, tolerance=TOLERANCE):
+    return bool(abs(result - claim) <= tolerance * abs(claim))
+
+
+def grouped_box_stats(data, by, col):
+    boxes = stats.box_stats(data, by, col)
+
+    return {str(key): {name: float(value) if name != 'count' else int(value) for name, value in row.items()}
+            for key, row in boxes.to_dict(orient='index').items()}
+
+
+def grouped_mean(data, by, col='price'):
+    df = data.groupby(by, observed=True).agg({col: 'mean'}).reset_index()
+    for key in np.atleast_1d(by):
+        df[key] = df[key].astype('int64')
+
+    return df.to_dict(orient='records')
+
+
+def period_mean(data, period, col='price'):
+    # Média por período (mês, semana ou ano da venda), identificado pela data de início
+    df = stats.growth_rates(data, period, col)
+    df['period'] = df['period'].dt.start_time.dt.strftime('%Y-%m-%d')
+
+    return df[['period', col]].to_dict(orient='records')
+
+
+def build_insights(data):
+    """
+    Calcula o resumo das hipóteses a partir do portfólio.
+
+    :param data: O dataframe de imóveis (``recommended_houses``).
+    :type data: DataFrame
+    """
+    waterfront = data['waterfront'].astype('int64')
+    condition = data['condition'].astype('int64')
+    basement = data['sqft_basement'] != 0
+
+    summary = {'n_rows': int(data.shape[0])}
+
+    summary['boxes'] = {
+        'price_by_waterfront': grouped_box_stats(data, waterfront, 'price'),
+        'sqft_lot_by_has_basement': grouped_box_stats(data, basement.astype('int64'), 'sqft_lot'),
+        'price_by_condition': grouped_box_stats(data, condition, 'price'),
+    }
+
+    summary['means'] = {
+        'new_house': grouped_mean(data, 'new_house'),
+        'year': grouped_mean(data, 'year'),
+        'mom_bathrooms_3': period_mean(data.loc[data['bathrooms'] == 3], 'mom'),
+        'bedrooms': grouped_mean(data, 'bedrooms'),
+        'condition': grouped_mean(data, 'condition'),
+        'waterfront_condition': grouped_mean(data, ['waterfront', 'condition']),
+        'grade': grouped_mean(data, 'grade'),
+        'wow': period_mean(data, 'wow'),
+    }
+
+    # Regressão linear (OLS) do preço pela condição, usada na linha de tendência de H7
+    slope, intercept = np.polyfit(condition.to_numpy(dtype='float64'), data['price'].to_numpy(dtype='float64'), 1)
+    summary['ols'] = {'price_by_condition': {'slope': float(slope), 'intercept': float(intercept)}}
+
+    price = data['price']
+    means = summary['means']
+    bad_condition = condition.isin([1, 2])
+
+    summary['results'] = {
+        'h1': diff_mean(price[waterfront == 0].mean(), price[waterfront == 1].mean()),
+        'h2': diff_mean(price[data['yr_built'] > 1955].mean(), price[data['yr_built'] <= 1955].mean()),
+        'h3': diff_mean(data.loc[basement, 'sqft_lot'].mean(), data.loc[~basement, 'sqft_lot'].mean()),
+        # Crescimentos YoY, MoM e WoW: média das variações entre períodos consecutivos da data de venda
+        'h4': mean_growth(data, 'yoy')['price'],
+        'h5': mean_growth(data.loc[data['bathrooms'] == 3], 'mom')['price'],
+        'h6': consecutive_percentage([row['price'] for row in means['bedrooms']]),
+        'h7': consecutive_percentage([row['price'] for row in means['condition']]),
+        'h8': diff_mean(price[(waterfront == 0) & bad_condition].mean(), price[(waterfront == 1) & bad_condition].mean()),
+        'h9': consecutive_percentage([row['price'] for row in means['grade']]),
+        'h10': mean_growth(data, 'wow')['price'],
+    }
+    summary['results'] = {key: float(value) for key, value in summary['results'].items()}
+    summary['hypotheses'] = {
+        key: {'claim': CLAIMS[key], 'result': value, 'valid': verdict(value, CLAIMS[key])}
+        for key, value in summary['results'].items()
+    }
+
+    return summary
+
+
+def save_insights(summary, filepath=INSIGHTS_PATH):
+    with open(filepath, 'w') as f:
+        json.dump(summary, f)
+
+
+def load_insights(filepath=INSIGHTS_PATH, get_data=None):
+    """
+    Lê o resumo salvo. Se o arquivo não existir, calcula a partir de ``get_data()`` e o salva.
+
+    :param filepath: Caminho do ``insights.json``.
+    :type filepath: str
+    :param get_data: Função que retorna o dataframe, usada quando o arquivo ainda não foi gerado.
+    :type get_data: callable
+    """
+    if not os.path.exists(filepath):
+        save_insights(build_insights(get_data()), filepath)
+
+    with open(filepath) as f:
+        return json.load(f)
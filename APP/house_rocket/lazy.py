@@ -0,0 +1,155 @@
+"""
+Importação sob demanda das dependências pesadas do dashboard.
+
+``lazy_import('folium')`` retorna um proxy: o módulo só é importado no primeiro
+acesso a um atributo, ou seja, quando a seção que o usa é renderizada. O tempo de
+cada importação fica em ``IMPORT_TIMES`` e aparece como uma seção ``import <módulo>``
+no perfil de renderização. ``warm_up`` importa os módulos pesados numa thread em
+segundo plano, depois da primeira renderização da página.
+
+Relatório do tempo de importação (a partir da pasta APP):
+    python -m house_rocket.lazy
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from house_rocket import profiling
+
+# Dependências carregadas sob demanda pelas páginas e pelo pacote
+HEAVY_MODULES = ['plotly.express', 'plotly.graph_objects', 'folium', 'folium.plugins', 'streamlit_folium',
+                 'geopandas', 'shapely', 'PIL.Image']
+
+# Importadas no início de todas as páginas
+EAGER_MODULES = ['numpy', 'pandas', 'streamlit', 'house_rocket.store', 'house_rocket.figures']
+
+WARM_UP = os.environ.get('HOUSE_ROCKET_WARM_UP', '1') == '1'
+
+IMPORT_TIMES = {}
+
+_lock = threading.Lock()
+_warm_up = None
+
+
+def load(name):
+    """
+    Importa o módulo, registrando o tempo da primeira importação.
+    """
+    # import_module espera a importação em andamento em outra thread (ex.: warm-up)
+    if name in sys.modules:
+        return importlib.import_module(name)
+
+    with profiling.section(f'import {name}'):
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        IMPORT_TIMES.setdefault(name, time.perf_counter() - start)
+
+    return module
+
+
+class LazyModule:
+    """
+    Proxy de um módulo importado no primeiro acesso a um atributo.
+
+    :param name: Nome completo do módulo (ex.: ``plotly.express``).
+    :type name: str
+    """
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = load(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'carregado' if self.__dict__['_module'] is not None else 'não carregado'
+        return f"<LazyModule '{self.__dict__['_name']}' ({state})>"
+
+
+def lazy_import(name):
+    return LazyModule(name)
+
+
+def warm_up(modules=HEAVY_MODULES, enabled=WARM_UP):
+    """
+    Importa ``modules`` numa thread em segundo plano (uma única vez por processo).
+    Deve ser chamada depois que a página já foi enviada ao navegador.
+    """
+    global _warm_up
+    if not enabled:
+        return None
+
+    with _lock:
+        if _warm_up is None:
+            def run():
+                for name in modules:
+                    try:
+                        load(name)
+                    except ImportError:
+                        pass
+
+            _warm_up = threading.Thread(target=run, name='house-rocket-warm-up', daemon=True)
+            _warm_up.start()
+
+    return _warm_up
+
+
+def import_times(modules):
+    """
+    Retorna o tempo de importação (s) de cada módulo num interpretador novo, sem
+    contar o que já foi importado pelos módulos anteriores da lista.
+
+    :param modules: Módulos, na ordem de importação.
+    :type modules: list
+    """
+    code = 'import time, json\ntimes = {}\n'
+    for name in modules:
+        code += f'start = time.perf_counter(); import {name}; times[{name!r}] = time.perf_counter() - start\n'
+    code += 'print(json.dumps(times))'
+
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def startup_report():
+    """
+    Retorna (importações no início da página, importações sob demanda), em segundos.
+    """
+    eager = import_times(EAGER_MODULES)
+    lazy = import_times(EAGER_MODULES + HEAVY_MODULES)
+
+    return eager, {name: lazy[name] for name in HEAVY_MODULES}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args()
+
+    eager, lazy = startup_report()
+
+    print('Importadas no início das páginas:')
+    for name, seconds in eager.items():
+        print(f'  {name:<28} {seconds:.3f}s')
+    print(f'  {"total":<28} {sum(eager.values()):.3f}s')
+
+    print('Sob demanda (primeiro uso ou warm-up em segundo plano):')
+    for name, seconds in lazy.items():
+        print(f'  {name:<28} {seconds:.3f}s')
+    print(f'  {"total":<28} {sum(lazy.values()):.3f}s')
+
+
+if __name__ == '__main__':
+    main()
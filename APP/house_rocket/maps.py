@@ -0,0 +1,151 @@
+"""
+Construção dos mapas folium do dashboard.
+
+Os marcadores são gerados no navegador com ``FastMarkerCluster``: o Python envia
+apenas um array compacto com os atributos de cada imóvel e o popup de cada marcador
+só é montado quando é aberto.
+
+Os mapas ``scatter_mapbox`` usam ``level_of_detail``: acima de ``MAX_MAP_POINTS`` imóveis
+os pontos são agregados numa grade e o navegador recebe no máximo esse número de pontos.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import lazy
+
+# Importados apenas quando um mapa folium é construído
+folium = lazy.lazy_import('folium')
+folium_plugins = lazy.lazy_import('folium.plugins')
+
+# Acima deste número de imóveis o scatter_mapbox mostra células agregadas
+MAX_MAP_POINTS = int(os.environ.get('HOUSE_ROCKET_MAX_MAP_POINTS', 4000))
+
+POPUP_COLS = ['price', 'date', 'sqft_living', 'bedrooms', 'bathrooms', 'yr_built']
+
+# row = [lat, long, price, date, sqft_living, bedrooms, bathrooms, yr_built]
+MARKER_CALLBACK = """
+    var callback = function (row) {
+        var marker = L.marker(new L.LatLng(row[0], row[1]));
+        marker.bindPopup(function () {
+            return 'Price $' + row[2] + ' on: ' + row[3] + '  Features: ' + row[4]
+                + 'sqft, ' + row[5] + ' bedrooms, ' + row[6]
+                + ' bathrooms, year built: ' + row[7];
+        });
+        return marker;
+    };
+"""
+
+
+def marker_rows(df):
+    """
+    Monta, de forma vetorizada, as linhas ``[lat, long, *POPUP_COLS]`` enviadas ao navegador.
+
+    :param df: Imóveis a serem exibidos no mapa.
+    :type df: DataFrame
+    """
+    columns = [df['lat'].to_numpy(), df['long'].to_numpy()]
+    for col in POPUP_COLS:
+        values = df[col]
+        if col == 'date':
+            values = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+        columns.append(values.to_numpy(dtype=object))
+
+    return np.column_stack(columns).tolist()
+
+
+def build_cluster_map(df):
+    """
+    Retorna o mapa de densidade com os imóveis agrupados em clusters.
+
+    :param df: Imóveis a serem exibidos no mapa.
+    :type df: DataFrame
+    """
+    density_map = folium.Map( location=[df['lat'].mean(),
+        df['long'].mean()],
+        default_zoom_start=15 )
+
+    folium_plugins.FastMarkerCluster( marker_rows(df), callback=MARKER_CALLBACK ).add_to( density_map )
+
+    return density_map
+
+
+def grid_cells(df, cell):
+    """
+    Retorna o índice da célula de cada imóvel numa grade de ``cell`` graus de latitude.
+    A largura em longitude é corrigida pela latitude média, para células aproximadamente
+    quadradas.
+
+    :param df: Imóveis com ``lat`` e ``long``.
+    :type df: DataFrame
+    :param cell: Altura da célula, em graus.
+    :type cell: float
+    """
+    lat = df['lat'].to_numpy()
+    long = df['long'].to_numpy()
+    cell_long = cell / np.cos(np.radians(lat.mean()))
+
+    rows = np.floor((lat - lat.min()) / cell).astype('int64')
+    cols = np.floor((long - long.min()) / cell_long).astype('int64')
+
+    return rows * (cols.max() + 1) + cols
+
+
+def aggregate_points(df, value_cols, max_points=None):
+    """
+    Agrega os imóveis em células de uma grade, dobrando o tamanho da célula (como os
+    níveis de uma quadtree) até haver no máximo ``max_points`` células. Cada célula vira
+    um ponto no centróide dos imóveis, com a média de ``value_cols`` e a contagem em ``imóveis``.
+
+    :param df: Imóveis com ``lat`` e ``long``.
+    :type df: DataFrame
+    :param value_cols: Colunas numéricas agregadas pela média.
+    :type value_cols: list
+    :param max_points: Número máximo de pontos; padrão ``MAX_MAP_POINTS``.
+    :type max_points: int
+    """
+    max_points = MAX_MAP_POINTS if max_points is None else max_points
+
+    lat = df['lat'].to_numpy()
+    long = df['long'].to_numpy()
+    area = max(np.ptp(lat) * np.ptp(long) * np.cos(np.radians(lat.mean())), 1e-12)
+
+    # Com células de sqrt(área / max_points) a grade inteira cabe no limite; começa 4x
+    # mais fino, já que a maior parte das células da grade fica vazia
+    cell = np.sqrt(area / max_points) / 4
+    while True:
+        keys, inverse = np.unique(grid_cells(df, cell), return_inverse=True)
+        if keys.shape[0] <= max_points:
+            break
+        cell *= 2
+
+    counts = np.bincount(inverse)
+    points = {
+        'lat': np.bincount(inverse, weights=lat) / counts,
+        'long': np.bincount(inverse, weights=long) / counts,
+    }
+    for col in value_cols:
+        points[col] = np.bincount(inverse, weights=df[col].to_numpy(dtype='float64')) / counts
+    points['imóveis'] = counts
+
+    return pd.DataFrame(points)
+
+
+def level_of_detail(df, value_cols, max_points=None):
+    """
+    Retorna (pontos, agregado): os próprios imóveis quando a seleção tem até ``max_points``
+    linhas ou as células de ``aggregate_points`` quando passa do limite.
+
+    :param df: Imóveis a serem exibidos no mapa.
+    :type df: DataFrame
+    :param value_cols: Colunas usadas na cor e no tamanho dos pontos.
+    :type value_cols: list
+    :param max_points: Número máximo de pontos; padrão ``MAX_MAP_POINTS``.
+    :type max_points: int
+    """
+    max_points = MAX_MAP_POINTS if max_points is None else max_points
+    if df.shape[0] <= max_points:
+        return df, False
+
+    return aggregate_points(df, value_cols, max_points), True
@@ -0,0 +1,324 @@
+"""
+Pipeline offline de recomendação: ingest -> clean -> score -> report.
+
+Gera ``recommended_houses.csv``, ``report1.csv`` e ``report2.csv`` em uma única
+passada sobre o ``kc_house_data.csv``, reproduzindo as regras do notebook.
+
+Com ``--comps k``, cada imóvel recebe o preço estimado pelos seus k comparáveis
+mais próximos (``house_rocket.comps``) em ``Comps Price``, ``Comps Count`` e ``Comps Distance``.
+
+Para bases que não cabem na memória, ``--mode streaming`` usa o modo em blocos de
+``house_rocket.streaming``. Com ``--workers``, o score e os relatórios são calculados
+em paralelo por grupos de zipcodes (todas as regras de negócio são por zipcode).
+
+Uso (a partir da pasta APP):
+    python -m house_rocket.pipeline --input ../kc_house_data.csv --output data
+    python -m house_rocket.pipeline --workers 0 --input ../kc_house_data.csv --output data
+    python -m house_rocket.pipeline --mode streaming --quantiles sketch --input <csv> --output data
+    python -m house_rocket.pipeline --comps 5 --input ../kc_house_data.csv --output data
+"""
+import argparse
+import json
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import comps, features, insights, stats
+
+OUTLIER_COLS = ['price', 'bedrooms', 'bathrooms', 'sqft_living', 'sqft_lot', 'floors']
+
+DROP_COLS = ['sqft_above', 'sqft_living15', 'sqft_lot15']
+
+REPORT1_COLS = ['id', 'date', 'zipcode', 'season', 'price', 'Median Price', 'condition', 'status', 'profit']
+
+REPORT2_COLS = ['id', 'zipcode', 'season', 'Median Price', 'price', 'Sell Price', 'Profit']
+
+# Limites de outliers e medianas da última execução (usados pela atualização incremental)
+STATE_FILE = 'pipeline_state.json'
+
+
+@contextmanager
+def timed(stage, timings):
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+    print(f'[{stage}] {timings[stage]:.3f}s')
+
+
+def outlier_bounds(data, cols):
+    """
+    Retorna os limites (inferior, superior) de cada coluna. Cada coluna, em ordem, é
+    calculada sobre as linhas que sobraram da remoção pelas colunas anteriores.
+
+    :param data: O dataframe completo.
+    :type data: DataFrame
+    :param cols: Colunas específicas do dataframe que passarão pelo processo de exclusão dos outliers.
+    :type cols: Lista
+    """
+    bounds = {}
+    for col in cols:
+        limits = stats.iqr_bounds(data, [col]).loc[col]
+        bounds[col] = (limits['lower'], limits['upper'])
+        data = data.loc[(data[col] > bounds[col][0]) & (data[col] < bounds[col][1])]
+    return bounds
+
+
+def outlier_mask(data, bounds):
+    mask = np.ones(data.shape[0], dtype=bool)
+    for col, (lower, upper) in bounds.items():
+        mask &= (data[col].to_numpy() > lower) & (data[col].to_numpy() < upper)
+    return mask
+
+
+def remove_outliers(data, cols):
+    """
+    Retorna um dataframe após a remoção dos outliers.
+
+    :param data: O dataframe a ter seus valores outliers removidos.
+    :type data: DataFrame
+    :param cols: Colunas específicas do dataframe que passarão pelo processo de exclusão dos outliers.
+    :type cols: Lista
+    """
+    return data.loc[outlier_mask(data, outlier_bounds(data, cols))]
+
+
+def ingest(filepath):
+    data = pd.read_csv(filepath)
+    data['date'] = pd.to_datetime(data['date'], format='%Y%m%dT%H%M%S')
+
+    return data
+
+
+def clean(data, bounds=None):
+    """
+    Remove os outliers e mantém apenas a venda mais recente de cada ``id``.
+
+    :param bounds: Limites de outliers já calculados (ex.: os salvos no estado do pipeline).
+    :type bounds: dict
+    """
+    if bounds is None:
+        bounds = outlier_bounds(data, OUTLIER_COLS)
+    data = data.loc[outlier_mask(data, bounds)]
+
+    # IDs duplicados: apenas a venda mais recente é considerada
+    data = data.sort_values('date', kind='stable').drop_duplicates('id', keep='last').sort_index()
+
+    return data.drop(columns=DROP_COLS, errors='ignore').reset_index(drop=True)
+
+
+def compute_medians(data):
+    """
+    Calcula uma única vez as medianas usadas pelo score e pelos dois relatórios.
+
+    :param data: O dataframe limpo, já com ``season``.
+    :type data: DataFrame
+    """
+    medians = {}
+    medians['zipcode'] = data.groupby('zipcode')['price'].median()
+
+    zip_median = data['zipcode'].map(medians['zipcode'])
+    buy = features.buy_status(data['price'], zip_median, data['condition']) == 'Buy'
+    medians['zipcode_season'] = data.loc[buy].groupby(['zipcode', 'season'])['price'].median()
+
+    return medians
+
+
+def lookup_season_median(data, medians):
+    keys = pd.MultiIndex.from_arrays([data['zipcode'], data['season']])
+
+    return medians['zipcode_season'].reindex(keys).to_numpy()
+
+
+def score(data, medians):
+    zip_median = data['zipcode'].map(medians['zipcode'])
+    data['status'] = features.buy_status(data['price'], zip_median, data['condition'])
+    data = features.add_sell_features(data, lookup_season_median(data, medians))
+
+    return data
+
+
+def build_reports(data, medians):
+    buy = data.loc[data['status'] == 'Buy'].copy()
+
+    report1 = buy.copy()
+    report1['Median Price'] = report1['zipcode'].map(medians['zipcode'])
+    report1['profit'] = report1['Median Price'] - report1['price']
+    report1 = report1[REPORT1_COLS]
+
+    report2 = buy.copy()
+    report2['Median Price'] = lookup_season_median(report2, medians)
+    report2 = report2[REPORT2_COLS].rename(columns={'zipcode': 'Region', 'price': 'Buy Price'})
+
+    return report1, report2
+
+
+def score_partition(data):
+    """
+    Calcula medianas, score e relatórios de um conjunto de zipcodes completos.
+    """
+    medians = compute_medians(data)
+    data = score(data, medians)
+
+    return (data, *build_reports(data, medians), medians)
+
+
+def partition_by_zipcode(data, n_partitions):
+    """
+    Divide os imóveis em até ``n_partitions`` partes com zipcodes inteiros e tamanhos
+    equilibrados (zipcodes maiores primeiro, cada um na parte com menos linhas).
+
+    :param data: O dataframe limpo.
+    :type data: DataFrame
+    :param n_partitions: Número máximo de partes.
+    :type n_partitions: int
+    """
+    sizes = data['zipcode'].value_counts().sort_index().sort_values(ascending=False, kind='stable')
+    loads = np.zeros(max(min(n_partitions, sizes.shape[0]), 1), dtype='int64')
+
+    assignment = {}
+    for zipcode, size in sizes.items():
+        part = int(loads.argmin())
+        assignment[zipcode] = part
+        loads[part] += size
+
+    codes = data['zipcode'].map(assignment).to_numpy()
+
+    return [data.loc[codes == part] for part in range(loads.shape[0])]
+
+
+def score_partitioned(data, workers=None):
+    """
+    Executa ``score_partition`` por grupos de zipcodes num pool de processos e
+    retorna (dados, report1, report2, medianas). O resultado é reordenado pelo
+    índice original, idêntico à execução serial.
+
+    :param data: O dataframe limpo, já com ``season``.
+    :type data: DataFrame
+    :param workers: Número de processos (None: todos os núcleos).
+    :type workers: int
+    """
+    workers = workers or os.cpu_count()
+    partitions = partition_by_zipcode(data, workers * 4)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(score_partition, partitions))
+
+    data, report1, report2, medians = zip(*results)
+    frames = [pd.concat(parts).sort_index(kind='stable') for parts in (data, report1, report2)]
+    medians = {key: pd.concat([part[key] for part in medians]).sort_index() for key in medians[0]}
+
+    return (*frames, medians)
+
+
+def save_state(output, bounds, medians, comps_k=0):
+    """
+    Salva os limites de outliers, as medianas usados no score e o número de comps, para
+    que ``house_rocket.incremental`` possa atualizar as saídas sem refazer tudo.
+    """
+    state = {
+        'outlier_bounds': {col: list(bound) for col, bound in bounds.items()},
+        'medians': {
+            'zipcode': [[int(zipcode), float(price)] for zipcode, price in medians['zipcode'].items()],
+            'zipcode_season': [[int(zipcode), season, float(price)]
+                               for (zipcode, season), price in medians['zipcode_season'].items()],
+        },
+    }
+    if comps_k:
+        state['comps_k'] = comps_k
+    with open(os.path.join(output, STATE_FILE), 'w') as f:
+        json.dump(state, f)
+
+
+def load_state(output):
+    with open(os.path.join(output, STATE_FILE)) as f:
+        state = json.load(f)
+
+    zipcode = pd.DataFrame(state['medians']['zipcode'], columns=['zipcode', 'price'])
+    zipcode_season = pd.DataFrame(state['medians']['zipcode_season'], columns=['zipcode', 'season', 'price'])
+
+    return {
+        'outlier_bounds': {col: tuple(bound) for col, bound in state['outlier_bounds'].items()},
+        'medians': {
+            'zipcode': zipcode.set_index('zipcode')['price'],
+            'zipcode_season': zipcode_season.set_index(['zipcode', 'season'])['price'],
+        },
+        'comps_k': state.get('comps_k', 0),
+    }
+
+
+def write_outputs(output, data, report1, report2):
+    os.makedirs(output, exist_ok=True)
+
+    data.drop(columns=['valor_m2']).to_csv(os.path.join(output, 'recommended_houses.csv'), date_format='%Y-%m-%d')
+    report1.to_csv(os.path.join(output, 'report1.csv'), date_format='%Y-%m-%d')
+    report2.to_csv(os.path.join(output, 'report2.csv'))
+    insights.save_insights(insights.build_insights(data), os.path.join(output, 'insights.json'))
+
+
+def run(filepath, output, workers=1, comps_k=0):
+    timings = {}
+
+    with timed('ingest', timings):
+        data = ingest(filepath)
+
+    with timed('clean', timings):
+        bounds = outlier_bounds(data, OUTLIER_COLS)
+        data = clean(data, bounds)
+        data = features.add_house_features(data)
+        data = features.add_date_features(data)
+
+    if workers == 1:
+        with timed('score', timings):
+            medians = compute_medians(data)
+            data = score(data, medians)
+
+        with timed('report', timings):
+            report1, report2 = build_reports(data, medians)
+    else:
+        with timed('score + report', timings):
+            data, report1, report2, medians = score_partitioned(data, workers)
+
+    if comps_k:
+        with timed('comps', timings):
+            data = comps.add_comps(data, comps_k)
+
+    with timed('write', timings):
+        write_outputs(output, data, report1, report2)
+        save_state(output, bounds, medians, comps_k)
+
+    print(f'Total: {sum(timings.values()):.3f}s | {data.shape[0]} imóveis | {report1.shape[0]} recomendados para compra')
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default='../kc_house_data.csv')
+    parser.add_argument('--output', default='data')
+    parser.add_argument('--mode', choices=['memory', 'streaming'], default='memory')
+    parser.add_argument('--quantiles', choices=['exact', 'sketch'], default='exact',
+                        help='Medianas e quartis exatos (duas passadas) ou aproximados (modo streaming).')
+    parser.add_argument('--relative-accuracy', type=float, default=0.005,
+                        help='Erro relativo máximo dos quantis aproximados (modo streaming).')
+    parser.add_argument('--chunk-size', type=int, default=250_000, help='Linhas por bloco (modo streaming).')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processos para o score por zipcode (0: todos os núcleos; modo memory).')
+    parser.add_argument('--comps', type=int, default=0,
+                        help='Comparáveis por imóvel para o preço estimado pelos comps (0: desativado; modo memory).')
+    args = parser.parse_args()
+
+    if args.mode == 'streaming':
+        from house_rocket import streaming
+
+        streaming.run(args.input, args.output, args.quantiles, args.relative_accuracy, args.chunk_size)
+    else:
+        run(args.input, args.output, args.workers or None, args.comps)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Instrumentação do tempo de renderização das páginas do dashboard.
+
+Ativada com a variável de ambiente ``HOUSE_ROCKET_PROFILE=1``. Cada execução de uma
+página registra o tempo e a variação de memória (tracemalloc) de cada seção, os
+acertos/falhas de cache dos carregadores de dados e o tamanho do payload de cada
+gráfico. O resultado é exibido num painel de debug na barra lateral e gravado em
+``HOUSE_ROCKET_PROFILE_LOG`` (JSON Lines). Desativada, não adiciona custo.
+
+O tracemalloc é global ao processo: é iniciado uma única vez, na primeira execução
+perfilada, e nunca é parado. Como o Streamlit executa as sessões em threads
+concorrentes, ``memory_delta_kb`` é a variação de memória do processo inteiro
+durante a seção e inclui alocações de outras sessões em execução no mesmo momento.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import pandas as pd
+
+ENABLED = os.environ.get('HOUSE_ROCKET_PROFILE', '0') == '1'
+
+LOG_PATH = os.environ.get('HOUSE_ROCKET_PROFILE_LOG', 'logs/render_profile.jsonl')
+
+_current = contextvars.ContextVar('house_rocket_profile', default=None)
+
+_lock = threading.Lock()
+
+
+def start_tracing():
+    # Uma vez por processo: parar ao fim de uma execução zeraria as medições das
+    # execuções concorrentes de outras sessões
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+class RenderProfile:
+    """
+    Medições de uma execução (rerun) de uma página.
+
+    :param page: Nome da página.
+    :type page: str
+    """
+    def __init__(self, page):
+        self.page = page
+        self.sections = []
+        self.cache = []
+        self.payloads = []
+        self.total = None
+
+    @contextmanager
+    def section(self, name):
+        tracing = tracemalloc.is_tracing()
+        memory = tracemalloc.get_traced_memory()[0] if tracing else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections.append({
+                'section': name,
+                'seconds': time.perf_counter() - start,
+                'memory_delta_kb': (tracemalloc.get_traced_memory()[0] - memory) / 1024 if tracing else None,
+            })
+
+    def cache_event(self, name, hit):
+        self.cache.append({'loader': name, 'hit': hit})
+
+    def payload(self, name, nbytes):
+        self.payloads.append({'chart': name, 'kb': nbytes / 1024})
+
+    def to_record(self):
+        return {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'page': self.page,
+            'total_seconds': self.total,
+            'sections': self.sections,
+            'cache': self.cache,
+            'payloads': self.payloads,
+        }
+
+    def write_log(self, path=LOG_PATH):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a') as f:
+            f.write(json.dumps(self.to_record()) + '\n')
+
+    def render_panel(self):
+        import streamlit as st
+
+        with st.sidebar.expander('Debug: perfil de renderização', expanded=False):
+            st.metric('Tempo total', f'{self.total:.3f}s')
+            st.dataframe(pd.DataFrame(self.sections))
+            if self.cache:
+                st.dataframe(pd.DataFrame(self.cache))
+            if self.payloads:
+                st.dataframe(pd.DataFrame(self.payloads))
+
+
+@contextmanager
+def profile_run(page, enabled=ENABLED):
+    """
+    Perfila uma execução completa da página: ``with profile_run('Página'): main()``.
+    """
+    if not enabled:
+        yield None
+        return
+
+    start_tracing()
+
+    profile = RenderProfile(page)
+    token = _current.set(profile)
+    start = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        profile.total = time.perf_counter() - start
+        _current.reset(token)
+
+        profile.write_log()
+        profile.render_panel()
+
+
+def section(name):
+    """
+    Mede uma seção da página atual (no-op se o profiling estiver desativado).
+    """
+    profile = _current.get()
+
+    return profile.section(name) if profile is not None else nullcontext()
+
+
+def timed(name):
+    """
+    Decorator equivalente a ``section`` para funções inteiras.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def cache_event(name, hit):
+    profile = _current.get()
+    if profile is not None:
+        profile.cache_event(name, hit)
+
+
+def payload(name, obj):
+    """
+    Registra o tamanho serializado de um gráfico plotly, mapa folium ou string/bytes.
+    """
+    profile = _current.get()
+    if profile is None:
+        return
+
+    if hasattr(obj, 'get_root'):
+        obj = obj.get_root().render()
+    elif hasattr(obj, 'to_json'):
+        obj = obj.to_json()
+    if isinstance(obj, str):
+        obj = obj.encode()
+
+    profile.payload(name, len(obj))
+
+
+def plotly_chart(container, name, fig, **kwargs):
+    """
+    ``container.plotly_chart(fig)`` registrando o tamanho do payload do gráfico.
+    """
+    payload(name, fig)
+
+    return container.plotly_chart(fig, **kwargs)
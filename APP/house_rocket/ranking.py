@@ -0,0 +1,140 @@
+"""
+Ranking dos melhores negócios (maior ``Profit``) por seleção parcial.
+
+``top_k`` usa ``np.partition`` (O(n)) para separar os k melhores e ordena apenas
+esses (O(k log k)). ``RankedDeals`` guarda, para o dataset inteiro e para cada
+grupo (zipcode, season), as posições dos ``DEPTH`` melhores já em ordem
+decrescente: consultas com k até ``DEPTH`` são um recorte do índice.
+"""
+import numpy as np
+
+# Quantidade de posições pré-calculadas por grupo
+DEPTH = 1000
+
+# Desempate: 'first' (posição menor primeiro) ou 'last' (posição maior primeiro)
+TIES = ['first', 'last']
+
+
+def top_k(values, k, descending=True, ties='first', tiebreak=None):
+    """
+    Retorna as posições dos k maiores (ou menores) valores, em ordem. Valores NaN são ignorados.
+
+    :param values: Valores a serem ranqueados.
+    :param k: Quantidade de posições retornadas.
+    :type k: int
+    :param descending: Maiores valores primeiro.
+    :type descending: bool
+    :param ties: Desempate pela posição: 'first' ou 'last'.
+    :type ties: str
+    :param tiebreak: Valores usados antes da posição no desempate (menor primeiro, ex.: preço).
+    """
+    if ties not in TIES:
+        raise ValueError(f'ties deve ser um de: {", ".join(TIES)}')
+
+    keys = np.asarray(values, dtype='float64')
+    keys = -keys if descending else keys
+    valid = ~np.isnan(keys)
+    k = int(min(k, valid.sum()))
+    if k <= 0:
+        return np.empty(0, dtype='int64')
+
+    # Todos os empatados com o k-ésimo entram como candidatos: o desempate decide
+    kth = np.partition(np.where(valid, keys, np.inf), k - 1)[k - 1]
+    candidates = np.flatnonzero(valid & (keys <= kth))
+
+    positions = candidates if ties == 'first' else -candidates
+    sort_keys = [positions] if tiebreak is None else [positions, np.asarray(tiebreak)[candidates]]
+    order = np.lexsort([*sort_keys, keys[candidates]])
+
+    return candidates[order[:k]]
+
+
+class RankedDeals:
+    """
+    Índice dos melhores negócios de um dataframe, global e por grupo.
+
+    :param data: Os imóveis (ex.: ``recommended_buy``).
+    :type data: DataFrame
+    :param col: Coluna ranqueada.
+    :type col: str
+    :param by: Colunas de agrupamento com índice pré-calculado.
+    :type by: list
+    :param ties: Desempate padrão ('first' ou 'last').
+    :type ties: str
+    :param depth: Posições pré-calculadas por grupo.
+    :type depth: int
+    """
+    def __init__(self, data, col='Profit', by=('zipcode', 'season'), ties='first', depth=DEPTH):
+        self.data = data
+        self.col = col
+        self.ties = ties
+        self.depth = depth
+        self._values = data[col].to_numpy(dtype='float64')
+
+        self._index = top_k(self._values, depth, ties=ties)
+        self._members = {}
+        self._groups = {}
+        for group_col in by:
+            codes, uniques = data[group_col].factorize()
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+
+            self._members[group_col] = {}
+            self._groups[group_col] = {}
+            for i, value in enumerate(uniques):
+                members = order[bounds[i]:bounds[i + 1]]
+                self._members[group_col][value] = members
+                self._groups[group_col][value] = members[top_k(self._values[members], depth, ties=ties)]
+
+    @property
+    def nbytes(self):
+        total = self._index.nbytes + self._values.nbytes
+        for groups in (self._members, self._groups):
+            total += sum(positions.nbytes for group in groups.values() for positions in group.values())
+        return total
+
+    def groups(self, by):
+        return list(self._groups[by])
+
+    def positions(self, k=10, by=None, group=None, ties=None):
+        """
+        Retorna as posições dos k melhores negócios, globais ou de um grupo.
+
+        :param k: Quantidade de negócios.
+        :type k: int
+        :param by: Coluna de agrupamento (uma das colunas ``by`` do índice).
+        :type by: str
+        :param group: Valor do grupo (ex.: um zipcode).
+        :param ties: Desempate ('first' ou 'last'); padrão o do índice.
+        :type ties: str
+        """
+        ties = self.ties if ties is None else ties
+        if by is None:
+            members, index = None, self._index
+        else:
+            members = self._members[by].get(group, np.empty(0, dtype='int64'))
+            index = self._groups[by].get(group, members)
+
+        # O índice cobre a consulta: k dentro da profundidade (ou o grupo inteiro)
+        size = self._values.shape[0] if members is None else members.shape[0]
+        if ties == self.ties and (k <= index.shape[0] or index.shape[0] == size):
+            return index[:k]
+
+        if members is None:
+            return top_k(self._values, k, ties=ties)
+
+        return members[top_k(self._values[members], k, ties=ties)]
+
+    def top(self, k=10, by=None, group=None, ties=None):
+        """
+        Retorna o recorte do dataframe com os k melhores negócios (mesmos argumentos de ``positions``).
+        """
+        return self.data.iloc[self.positions(k, by, group, ties)]
+
+    def top_by(self, k, by, ties=None):
+        """
+        Retorna os k melhores negócios de cada grupo de ``by``.
+        """
+        positions = [self.positions(k, by, group, ties) for group in self._groups[by]]
+
+        return self.data.iloc[np.concatenate(positions) if positions else []]
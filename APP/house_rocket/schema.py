@@ -0,0 +1,187 @@
+"""
+Esquema compacto da tabela de imóveis carregada pelo dashboard.
+
+O CSV é lido direto nos tipos menores (int8/int16/int32 e float32 onde os valores
+são exatos), ``zipcode``, ``season``, ``status`` e ``month`` viram categóricas e as
+variáveis binárias (waterfront, has_basement, new_house e renovated) são
+compactadas em bits de uma única coluna ``flags``. ``expand`` recria as colunas
+binárias num recorte (ex.: o resultado dos filtros) para exibição e exportação.
+
+Uso (a partir da pasta APP):
+    python -m house_rocket.schema
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import features
+
+# Versão do esquema compacto, parte da chave do cache Feather: incrementar quando
+# ``compact`` ou as funções de ``features`` que ele usa mudarem
+SCHEMA_VERSION = 1
+
+# Tipos usados na leitura do recommended_houses.csv
+CSV_DTYPES = {
+    'id': 'int64',
+    'price': 'float64',
+    'bedrooms': 'int8',
+    'bathrooms': 'float32',        # múltiplos de 0.25: exatos em float32
+    'sqft_living': 'int32',
+    'sqft_lot': 'int32',
+    'floors': 'float32',           # múltiplos de 0.5: exatos em float32
+    'waterfront': 'int8',
+    'view': 'int8',
+    'condition': 'int8',
+    'grade': 'int8',
+    'sqft_basement': 'int16',
+    'yr_built': 'int16',
+    'yr_renovated': 'int16',
+    'zipcode': 'int32',
+    'lat': 'float64',
+    'long': 'float64',
+    'has_basement': 'int8',
+    'new_house': 'int8',
+    'week': 'int8',
+    'month': 'int8',
+    'year': 'int16',
+    'season': pd.CategoricalDtype(features.SEASONS),
+    'status': pd.CategoricalDtype(['Buy', 'Not Buy']),
+    'Sell Price': 'float64',
+    'Profit': 'float64',
+}
+
+# Colunas convertidas para categóricas depois da leitura (categorias numéricas)
+CATEGORY_COLS = ['zipcode', 'month']
+
+# Bit de cada variável binária na coluna ``flags``
+FLAGS = {
+    'waterfront': 1,
+    'has_basement': 2,
+    'new_house': 4,
+    'renovated': 8,
+}
+
+# Colunas exibidas como categóricas nas métricas de resumo
+CATEGORICAL = ['zipcode', 'season', 'status', 'month', 'view', 'condition', 'waterfront', 'has_basement', 'new_house']
+
+
+def pack_flags(data):
+    """
+    Retorna a coluna ``flags`` (uint8) com um bit por variável de ``FLAGS``.
+    ``renovated`` é calculada a partir de ``yr_renovated``.
+
+    :param data: O dataframe com as colunas binárias.
+    :type data: DataFrame
+    """
+    flags = np.zeros(data.shape[0], dtype='uint8')
+    for col, bit in FLAGS.items():
+        values = data['yr_renovated'].to_numpy() > 0 if col == 'renovated' else data[col].to_numpy() != 0
+        flags |= np.where(values, bit, 0).astype('uint8')
+
+    return pd.Series(flags, index=data.index, name='flags')
+
+
+def unpack_flags(data, cols=FLAGS):
+    """
+    Retorna as colunas binárias (int8, 0/1) guardadas em ``flags``.
+
+    :param data: O dataframe compacto.
+    :type data: DataFrame
+    :param cols: Variáveis de ``FLAGS`` a serem recriadas.
+    :type cols: list
+    """
+    flags = data['flags'].to_numpy()
+
+    return {col: pd.Series(((flags & FLAGS[col]) != 0).astype('int8'), index=data.index, name=col) for col in cols}
+
+
+def compact(data):
+    """
+    Converte o dataframe lido com ``CSV_DTYPES`` para o esquema compacto: datas,
+    categóricas, ``flags`` e ``valor_m2``.
+
+    :param data: O dataframe lido do recommended_houses.csv.
+    :type data: DataFrame
+    """
+    data['date'] = pd.to_datetime(data['date'])
+
+    for col in CATEGORY_COLS:
+        data[col] = data[col].astype('category')
+
+    position = data.columns.get_loc('waterfront')
+    flags = pack_flags(data)
+    data = data.drop(columns=[col for col in FLAGS if col in data.columns])
+    data.insert(position, 'flags', flags)
+
+    data['valor_m2'] = features.add_valor_m2(data)
+
+    return data
+
+
+def expand(data):
+    """
+    Recria as colunas binárias de ``flags`` (exceto ``renovated``, que não faz parte
+    do CSV original) nas posições originais.
+
+    :param data: Um recorte do dataframe compacto.
+    :type data: DataFrame
+    """
+    if 'flags' not in data.columns:
+        return data
+
+    columns = unpack_flags(data, ['waterfront', 'has_basement', 'new_house'])
+    position = data.columns.get_loc('flags')
+    data = data.drop(columns=['flags'])
+    data.insert(position, 'waterfront', columns['waterfront'])
+
+    position = data.columns.get_loc('week') if 'week' in data.columns else data.shape[1]
+    data.insert(position, 'has_basement', columns['has_basement'])
+    data.insert(position + 1, 'new_house', columns['new_house'])
+
+    return data
+
+
+def read_houses(filepath, **read_csv_kwargs):
+    return compact(pd.read_csv(filepath, dtype=CSV_DTYPES, **read_csv_kwargs))
+
+
+def memory_report(before, after):
+    """
+    Retorna a memória (MB) de cada coluna antes e depois da compactação.
+
+    :param before: O dataframe com os tipos padrão.
+    :type before: DataFrame
+    :param after: O dataframe compacto.
+    :type after: DataFrame
+    """
+    report = pd.DataFrame({
+        'antes (MB)': before.memory_usage(index=False, deep=True) / 1024 ** 2,
+        'depois (MB)': after.memory_usage(index=False, deep=True) / 1024 ** 2,
+        'tipo antes': before.dtypes.astype(str),
+        'tipo depois': after.dtypes.astype(str),
+    }).reindex(list(dict.fromkeys([*before.columns, *after.columns])))
+    report.loc['TOTAL', ['antes (MB)', 'depois (MB)']] = report[['antes (MB)', 'depois (MB)']].sum()
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default='data/recommended_houses.csv')
+    args = parser.parse_args()
+
+    before = pd.read_csv(args.input, index_col=0)
+    after = read_houses(args.input, index_col=0)
+    report = memory_report(before, after)
+
+    with pd.option_context('display.width', 200, 'display.max_rows', 100):
+        print(report.round(3))
+
+    total = report.loc['TOTAL']
+    print(f"{total['antes (MB)']:.2f} MB -> {total['depois (MB)']:.2f} MB "
+          f"({total['antes (MB)'] / total['depois (MB)']:.1f}x menor)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Estatísticas usadas pelo pipeline e pelas hipóteses da página de Insights.
+
+Versões vetorizadas e agrupadas das funções do notebook: crescimento percentual
+entre períodos consecutivos (MoM, WoW, YoY), limites de outliers pelo IQR e
+estatísticas de box plot. Os quantis de todas as colunas e grupos são calculados
+numa única chamada.
+"""
+import numpy as np
+import pandas as pd
+
+# Frequência do período de cada taxa de crescimento, derivado de ``date``: mês e
+# semana ficam associados ao ano (maio/2014 e maio/2015 são períodos diferentes)
+PERIODS = {
+    'mom': 'M',
+    'wow': 'W',
+    'yoy': 'Y',
+}
+
+# Fator do IQR usado na remoção de outliers do pipeline
+OUTLIER_FACTOR = 2
+
+
+def diff_mean(val1, val2):
+    percent = round(100*(val2 - val1)/val1, 2)
+    return percent
+
+
+def pct_change(values):
+    """
+    Retorna o crescimento percentual entre valores consecutivos (um a menos que a entrada).
+
+    :param values: Valores já ordenados; arrays 2D são tratados coluna a coluna.
+    """
+    values = np.asarray(values, dtype='float64')
+
+    return 100 * np.diff(values, axis=0) / values[:-1]
+
+
+def consecutive_percentage(values):
+    """
+    Retorna o crescimento percentual médio entre valores consecutivos.
+
+    :param values: Valores já ordenados (ex.: preço médio por mês).
+    """
+    return float(np.mean(pct_change(values)))
+
+
+def growth_rates(data, period, cols='price', by=None):
+    """
+    Retorna a média de ``cols`` por período, em ordem cronológica, e o crescimento em
+    relação ao período anterior (``<col>_growth``), para todos os grupos de uma vez.
+
+    :param data: O dataframe de imóveis.
+    :type data: DataFrame
+    :param period: Uma chave de ``PERIODS`` ('mom', 'wow', 'yoy'), que gera a coluna
+        ``period`` a partir de ``date``, ou uma coluna já ordenável cronologicamente.
+    :type period: str
+    :param cols: Coluna(s) agregadas pela média.
+    :type cols: str or list
+    :param by: Coluna(s) de agrupamento; cada grupo tem sua própria sequência de períodos.
+    :type by: str or list
+    """
+    cols = list(np.atleast_1d(cols))
+    by = list(np.atleast_1d(by)) if by is not None else []
+    key = data['date'].dt.to_period(PERIODS[period]).rename('period') if period in PERIODS else period
+
+    means = data.groupby(by + [key], observed=True)[cols].mean().sort_index().reset_index()
+
+    previous = means.groupby(by, observed=True)[cols].shift() if by else means[cols].shift()
+    growth = 100 * (means[cols] - previous) / previous
+
+    return means.join(growth.add_suffix('_growth'))
+
+
+def mean_growth(data, period, cols='price', by=None):
+    """
+    Retorna o crescimento médio entre períodos consecutivos de cada coluna (e grupo).
+    Equivale a ``consecutive_percentage`` das médias por período.
+    """
+    rates = growth_rates(data, period, cols, by)
+    growth = [col for col in rates.columns if col.endswith('_growth')]
+    if by is None:
+        return rates[growth].mean().rename(lambda col: col[:-len('_growth')])
+
+    return rates.groupby(by, observed=True)[growth].mean().rename(columns=lambda col: col[:-len('_growth')])
+
+
+def iqr_bounds(data, cols, factor=OUTLIER_FACTOR, by=None):
+    """
+    Retorna q1, q3 e os limites (q1 - factor * IQR, q3 + factor * IQR) de cada coluna,
+    indexados por ``column`` (e pelos grupos de ``by``). Os quartis de todas as colunas
+    são calculados numa única chamada.
+
+    :param data: O dataframe.
+    :type data: DataFrame
+    :param cols: Colunas numéricas.
+    :type cols: list
+    :param factor: Múltiplo do IQR somado/subtraído aos quartis.
+    :type factor: float
+    :param by: Coluna(s) de agrupamento.
+    :type by: str or list
+    """
+    source = data.groupby(by, observed=True)[cols] if by is not None else data[cols]
+    quartiles = source.quantile([0.25, 0.75])
+
+    # Linhas: [grupos...], quantil | colunas: cols -> linhas: [grupos...], column | colunas: q1, q3
+    quartiles.columns.name = 'column'
+    quartiles = quartiles.stack().unstack(-2)
+    quartiles.columns = ['q1', 'q3']
+
+    iqr = quartiles['q3'] - quartiles['q1']
+    quartiles['lower'] = quartiles['q1'] - iqr * factor
+    quartiles['upper'] = quartiles['q3'] + iqr * factor
+
+    return quartiles
+
+
+def box_stats(data, by, col):
+    """
+    Retorna, por grupo, as estatísticas de um box plot no formato aceito pelo ``go.Box``:
+    quartis, cercas (valores extremos dentro de 1.5 IQR) e contagem.
+
+    :param data: O dataframe.
+    :type data: DataFrame
+    :param by: Coluna ou Series de agrupamento.
+    :type by: str or Series
+    :param col: Coluna numérica.
+    :type col: str
+    """
+    values = data[col].astype('float64')
+    groups = values.groupby(by, observed=True)
+
+    stats = groups.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ['q1', 'median', 'q3']
+
+    iqr = stats['q3'] - stats['q1']
+    keys = stats.index.get_indexer(by if isinstance(by, pd.Series) else data[by])
+    lower = (stats['q1'] - 1.5 * iqr).to_numpy()[keys]
+    upper = (stats['q3'] + 1.5 * iqr).to_numpy()[keys]
+
+    stats['lowerfence'] = values.where(values.to_numpy() >= lower).groupby(by, observed=True).min()
+    stats['upperfence'] = values.where(values.to_numpy() <= upper).groupby(by, observed=True).max()
+    stats['count'] = groups.size()
+
+    return stats
@@ -0,0 +1,192 @@
+"""
+Store de datasets compartilhado por todas as páginas e sessões do processo.
+
+Cada dataset é carregado uma única vez por processo (via cache colunar) e as
+páginas recebem apenas views rasas. Com Copy-on-Write ativo, qualquer alteração
+feita por uma página gera uma cópia local e nunca corrompe o dado compartilhado.
+Quando a memória total ultrapassa o teto, os datasets usados há mais tempo são
+descarregados junto com os datasets derivados deles (que mantêm referências ao
+dado base e impediriam a liberação da memória); colunas de um derivado que
+compartilham memória com o dataset base não são contadas duas vezes. Datasets registrados com ``paths`` são recarregados quando algum
+desses arquivos muda (ex.: após ``house_rocket.incremental``).
+"""
+import json
+import os
+import threading
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import cache, comps, filters, geo, insights, profiling, ranking, schema, summary
+
+if int(pd.__version__.split('.')[0]) == 2:
+    # pandas >= 3 já usa Copy-on-Write sempre
+    pd.set_option('mode.copy_on_write', True)
+
+MAX_MEMORY_MB = float(os.environ.get('HOUSE_ROCKET_STORE_MAX_MB', 256))
+
+HOUSES_PATH = 'data/recommended_houses.csv'
+
+_lock = threading.RLock()
+_loaders = {}
+_datasets = OrderedDict()
+_versions = {}
+_paths = {}
+_mtimes = {}
+# Datasets lidos por cada dataset durante a sua carga (nome -> bases)
+_dependencies = {}
+_loading = []
+
+
+def register(name, loader, paths=()):
+    """
+    Registra a função que carrega um dataset.
+
+    :param name: Nome do dataset no store.
+    :type name: str
+    :param loader: Função sem argumentos que retorna o DataFrame.
+    :type loader: callable
+    :param paths: Arquivos de origem; o dataset é recarregado quando algum deles muda.
+    :type paths: tuple
+    """
+    _loaders[name] = loader
+    _paths[name] = tuple(paths)
+
+
+def _source_mtimes(name):
+    return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else None for path in _paths.get(name, ()))
+
+
+def dataset_memory(data):
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=True, deep=True).sum())
+    if hasattr(data, 'nbytes'):
+        return int(data.nbytes)
+
+    return len(json.dumps(data))
+
+
+def _numeric_arrays(data):
+    columns = [data.index] + [data[col] for col in data.select_dtypes(include='number').columns]
+    return [column.to_numpy() for column in columns if pd.api.types.is_numeric_dtype(column.dtype)]
+
+
+def _shared_memory(data, name):
+    # Bytes do índice e das colunas numéricas de ``data`` que são views de colunas dos datasets base
+    if not isinstance(data, pd.DataFrame):
+        return 0
+
+    bases = [_datasets[base][0] for base in _dependencies.get(name, ()) if base in _datasets]
+    arrays = [array for base in bases if isinstance(base, pd.DataFrame) for array in _numeric_arrays(base)]
+
+    return sum(array.nbytes for array in _numeric_arrays(data)
+               if any(np.may_share_memory(array, base) for base in arrays))
+
+
+def memory_usage():
+    """
+    Retorna a memória ocupada (em bytes) por cada dataset carregado.
+    """
+    with _lock:
+        return {name: size for name, (_, size) in _datasets.items()}
+
+
+def _dependents(name):
+    # O dataset e todos os carregados que dependem dele, direta ou indiretamente
+    group, pending = {name}, [name]
+    while pending:
+        base = pending.pop()
+        for other, bases in _dependencies.items():
+            if base in bases and other in _datasets and other not in group:
+                group.add(other)
+                pending.append(other)
+
+    return group
+
+
+def _evict(keep):
+    limit = MAX_MEMORY_MB * 1024 ** 2
+    while sum(size for _, size in _datasets.values()) > limit:
+        # O menos usado recentemente que pode sair junto com os seus derivados sem levar ``keep``
+        groups = (_dependents(name) for name in _datasets)
+        group = next((group for group in groups if keep not in group), None)
+        if group is None:
+            break
+        for name in group:
+            del _datasets[name]
+
+
+def get_dataset(name):
+    """
+    Retorna uma view somente-leitura (Copy-on-Write) do dataset compartilhado.
+    Resumos e índices pré-calculados são retornados diretamente e não devem ser alterados.
+
+    :param name: Nome de um dataset registrado.
+    :type name: str
+    """
+    with _lock:
+        mtimes = _source_mtimes(name)
+        if name in _datasets and _mtimes.get(name) != mtimes:
+            del _datasets[name]
+
+        if _loading:
+            _dependencies.setdefault(_loading[-1], set()).add(name)
+
+        profiling.cache_event(f'store:{name}', name in _datasets)
+        if name in _datasets:
+            _datasets.move_to_end(name)
+        else:
+            _dependencies.pop(name, None)
+            _loading.append(name)
+            try:
+                data = _loaders[name]()
+            finally:
+                _loading.pop()
+            _datasets[name] = (data, dataset_memory(data) - _shared_memory(data, name))
+            _mtimes[name] = mtimes
+            _versions[name] = _versions.get(name, 0) + 1
+            _evict(keep=name)
+
+        data, _ = _datasets[name]
+
+    if isinstance(data, pd.DataFrame):
+        return data.copy(deep=False)
+
+    return data
+
+
+def version(name):
+    """
+    Retorna a versão do dataset, incrementada a cada (re)carga. Usada nas chaves de cache
+    derivadas do dataset.
+    """
+    with _lock:
+        if name not in _datasets:
+            get_dataset(name)
+
+        return f'{name}:{_versions[name]}'
+
+
+def clear():
+    with _lock:
+        _datasets.clear()
+
+
+register('recommended_houses', lambda: cache.read_csv_cached(HOUSES_PATH, transform=schema.compact,
+                                                             dtype=schema.CSV_DTYPES, index_col=0),
+         paths=[HOUSES_PATH])
+register('recommended_buy', lambda: get_dataset('recommended_houses').query("status == 'Buy'"), paths=[HOUSES_PATH])
+register('report1', lambda: cache.read_csv_cached('data/report1.csv', index_col=0), paths=['data/report1.csv'])
+register('report2', lambda: cache.read_csv_cached('data/report2.csv', index_col=0), paths=['data/report2.csv'])
+register('insights', lambda: insights.load_insights(get_data=lambda: schema.expand(get_dataset('recommended_houses'))),
+         paths=[insights.INSIGHTS_PATH])
+register('recommended_houses_filters', lambda: filters.FilterEngine(get_dataset('recommended_houses')),
+         paths=[HOUSES_PATH])
+register('recommended_houses_summary', lambda: summary.SummaryIndex(get_dataset('recommended_houses')),
+         paths=[HOUSES_PATH])
+register('recommended_buy_deals', lambda: ranking.RankedDeals(get_dataset('recommended_buy')), paths=[HOUSES_PATH])
+register('comps', lambda: comps.CompsIndex(get_dataset('recommended_houses')), paths=[HOUSES_PATH])
+register('zipcodes', geo.get_zipcodes, paths=[geo.ZIPCODES_PATH])
+register('zip_prices', lambda: geo.zip_price_table(get_dataset('recommended_buy')), paths=[HOUSES_PATH])
@@ -0,0 +1,453 @@
+"""
+Modo out-of-core do pipeline de recomendação, para bases que não cabem na memória.
+
+O CSV de entrada é lido em blocos de ``CHUNK_SIZE`` linhas, duas vezes:
+
+1. As colunas usadas nas estatísticas são gravadas numa projeção binária em disco
+   (lida via memory-map). Os limites de outliers, a deduplicação por ``id`` e as
+   medianas por zipcode e por (zipcode, estação) são calculados sobre essa projeção,
+   bloco a bloco.
+2. Cada bloco do CSV é limpo, pontuado com as medianas já calculadas e anexado aos
+   CSVs de saída.
+
+Os quantis podem ser exatos (``exact``: um sketch localiza o bucket de cada quantil e
+uma segunda passada seleciona o valor exato dentro dele) ou aproximados (``sketch``:
+erro relativo máximo ``relative_accuracy``). A memória usada depende do tamanho do
+bloco, do número de grupos e do número de ``id`` distintos, não do número de linhas.
+
+Uso (a partir da pasta APP):
+    python -m house_rocket.pipeline --mode streaming --input ../kc_house_data.csv --output data
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from house_rocket import features, pipeline
+
+CHUNK_SIZE = 250_000
+
+QUANTILE_METHODS = ['exact', 'sketch']
+
+RELATIVE_ACCURACY = 0.005
+
+# Colunas da projeção em disco e seus tipos
+PROJECTION_COLS = {
+    'id': 'int64',
+    'date': 'int64',
+    'season': 'int8',
+    'zipcode': 'int64',
+    'condition': 'int64',
+    **{col: 'float64' for col in pipeline.OUTLIER_COLS},
+}
+
+_ZERO_KEY = 0
+_KEY_OFFSET = 1 << 32
+
+
+def _lerp(a, b, t):
+    # Mesma fórmula da interpolação linear do numpy (usada por Series.quantile)
+    diff = b - a
+    result = np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+    return np.where(a == b, a, result)
+
+
+def _interpolate(a, b, t, midpoint):
+    if midpoint:
+        # Mediana: média dos dois valores centrais, como no groupby().median()
+        return np.where(t > 0, (a + b) / 2, a)
+
+    return _lerp(a, b, t)
+
+
+class QuantileSketch:
+    """
+    Sketch de quantis por grupo com erro relativo limitado (buckets logarítmicos,
+    como o DDSketch). Sketches de blocos diferentes podem ser combinados com ``merge``.
+
+    :param relative_accuracy: Erro relativo máximo dos quantis aproximados.
+    :type relative_accuracy: float
+    """
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        # Por (grupo, bucket): quantidade, menor e maior valor
+        self.buckets = pd.DataFrame({'count': pd.Series(dtype='int64'), 'min': pd.Series(dtype='float64'),
+                                     'max': pd.Series(dtype='float64')},
+                                    index=pd.MultiIndex.from_arrays([[], []], names=['group', 'key']))
+
+    def keys(self, values):
+        """
+        Retorna o bucket de cada valor. A ordem dos buckets é a mesma dos valores.
+        """
+        values = np.asarray(values, dtype='float64')
+        magnitude = np.abs(values)
+        with np.errstate(divide='ignore'):
+            exponent = np.ceil(np.log(magnitude) / self._log_gamma)
+        key = np.where(magnitude > 0, exponent, 0).astype('int64') + _KEY_OFFSET
+
+        return np.where(values > 0, key, np.where(values < 0, -key, _ZERO_KEY))
+
+    def values(self, keys):
+        """
+        Retorna o valor representativo de cada bucket.
+        """
+        keys = np.asarray(keys, dtype='int64')
+        exponent = np.abs(keys) - _KEY_OFFSET
+        value = 2 * self.gamma ** exponent.astype('float64') / (self.gamma + 1)
+
+        return np.where(keys == _ZERO_KEY, 0.0, np.sign(keys) * value)
+
+    def add(self, groups, values):
+        values = np.asarray(values, dtype='float64')
+        valid = ~np.isnan(values)
+        if not valid.any():
+            return
+
+        chunk = pd.DataFrame({'group': np.asarray(groups)[valid], 'key': self.keys(values[valid]),
+                              'value': values[valid]})
+        self._add_buckets(chunk.groupby(['group', 'key'])['value'].agg(['count', 'min', 'max']))
+
+    def merge(self, other):
+        self._add_buckets(other.buckets)
+
+    def _add_buckets(self, buckets):
+        combined = pd.concat([self.buckets, buckets]) if self.buckets.shape[0] else buckets
+        self.buckets = combined.groupby(level=['group', 'key']).agg({'count': 'sum', 'min': 'min', 'max': 'max'})
+
+    def ranks(self, q):
+        """
+        Retorna, por grupo, as posições das duas estatísticas de ordem que definem o
+        quantil ``q`` (interpolação linear), o bucket de cada uma e quantos valores
+        do grupo estão abaixo do bucket da primeira.
+        """
+        buckets = self.buckets.sort_index()
+        counts = buckets['count']
+        keys = counts.index.get_level_values('key').to_numpy()
+        cumulative = counts.to_numpy().cumsum()
+
+        # Valor representativo limitado ao menor/maior valor visto no bucket: exato
+        # quando o bucket tem um único valor distinto (ex.: bedrooms, floors)
+        representative = np.clip(self.values(keys), buckets['min'].to_numpy(), buckets['max'].to_numpy())
+
+        n = counts.groupby(level='group').sum()
+        start = (n.cumsum() - n).to_numpy()
+        position = (n.to_numpy() - 1) * q
+        low, high = np.floor(position), np.ceil(position)
+
+        # Contagem acumulada global: o grupo g ocupa as posições [start, start + n)
+        low_idx = np.searchsorted(cumulative, start + low, side='right')
+        high_idx = np.searchsorted(cumulative, start + high, side='right')
+
+        return pd.DataFrame({
+            'low': low.astype('int64'),
+            'high': high.astype('int64'),
+            't': position - low,
+            'low_key': keys[low_idx],
+            'high_key': keys[high_idx],
+            'below': cumulative[low_idx] - counts.to_numpy()[low_idx] - start,
+            'low_value': representative[low_idx],
+            'high_value': representative[high_idx],
+        }, index=n.index)
+
+    def quantile(self, q, midpoint=False):
+        ranks = self.ranks(q)
+        value = _interpolate(ranks['low_value'].to_numpy(), ranks['high_value'].to_numpy(), ranks['t'].to_numpy(),
+                             midpoint)
+
+        return pd.Series(value, index=ranks.index)
+
+
+def exact_quantiles(sketch, qs, chunks, midpoint=False):
+    """
+    Calcula quantis exatos com uma segunda passada: apenas os valores que caem nos
+    buckets dos quantis (segundo ``sketch``) são guardados, como contagens por valor.
+
+    :param sketch: Sketch já alimentado com todos os valores.
+    :type sketch: QuantileSketch
+    :param qs: Quantis desejados.
+    :type qs: list
+    :param chunks: Função que retorna um iterador de (grupos, valores), a mesma entrada do sketch.
+    :type chunks: callable
+    """
+    qs = sorted(qs)
+    ranks = {q: sketch.ranks(q) for q in qs}
+    low_key = ranks[qs[0]]['low_key']
+    high_key = ranks[qs[-1]]['high_key']
+
+    candidates = pd.Series(dtype='int64', index=pd.MultiIndex.from_arrays([[], []], names=['group', 'value']))
+    for groups, values in chunks():
+        values = np.asarray(values, dtype='float64')
+        keys = sketch.keys(values)
+        mask = ((keys >= low_key.reindex(groups).to_numpy()) & (keys <= high_key.reindex(groups).to_numpy())
+                & ~np.isnan(values))
+        chunk = pd.DataFrame({'group': np.asarray(groups)[mask], 'value': values[mask]})
+        candidates = candidates.add(chunk.value_counts(), fill_value=0).astype('int64')
+
+    candidates = candidates.sort_index()
+    values = candidates.index.get_level_values('value').to_numpy()
+    cumulative = candidates.to_numpy().cumsum()
+    n = candidates.groupby(level='group').sum()
+    start = pd.Series((n.cumsum() - n).to_numpy(), index=n.index).reindex(low_key.index).to_numpy()
+
+    # Posição de cada estatística de ordem dentro dos candidatos do grupo
+    below = ranks[qs[0]]['below'].to_numpy()
+    result = {}
+    for q in qs:
+        a = values[np.searchsorted(cumulative, start + ranks[q]['low'].to_numpy() - below, side='right')]
+        b = values[np.searchsorted(cumulative, start + ranks[q]['high'].to_numpy() - below, side='right')]
+        result[q] = _interpolate(a, b, ranks[q]['t'].to_numpy(), midpoint)
+
+    return pd.DataFrame(result, index=low_key.index)
+
+
+def grouped_quantiles(chunks, qs, method='exact', relative_accuracy=RELATIVE_ACCURACY, midpoint=False):
+    """
+    Retorna um dataframe (grupos x quantis) calculado bloco a bloco.
+
+    :param chunks: Função que retorna um iterador de (grupos, valores).
+    :type chunks: callable
+    :param method: 'exact' (duas passadas) ou 'sketch' (uma passada, aproximado).
+    :type method: str
+    """
+    if method not in QUANTILE_METHODS:
+        raise ValueError(f'Método de quantil desconhecido: {method}')
+
+    sketch = QuantileSketch(relative_accuracy)
+    for groups, values in chunks():
+        sketch.add(groups, values)
+
+    if method == 'exact':
+        return exact_quantiles(sketch, qs, chunks, midpoint)
+
+    return pd.DataFrame({q: sketch.quantile(q, midpoint) for q in qs})
+
+
+class Projection:
+    """
+    Colunas de ``PROJECTION_COLS`` gravadas em disco, uma por arquivo, e lidas via memory-map.
+
+    :param folder: Pasta dos arquivos da projeção.
+    :type folder: str
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self.n = 0
+        self.columns = {}
+        self._files = {col: open(self.path(col), 'wb') for col in PROJECTION_COLS}
+
+    def path(self, col):
+        return os.path.join(self.folder, f'{col}.bin')
+
+    def append(self, chunk):
+        for col, dtype in PROJECTION_COLS.items():
+            np.asarray(chunk[col], dtype=dtype).tofile(self._files[col])
+        self.n += chunk.shape[0]
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+        if self.n == 0:
+            raise ValueError('O arquivo de entrada não possui linhas.')
+
+        self.columns = {col: np.memmap(self.path(col), dtype=dtype, mode='r', shape=(self.n,))
+                        for col, dtype in PROJECTION_COLS.items()}
+
+    def new_mask(self, name, value=True):
+        mask = np.memmap(os.path.join(self.folder, f'{name}.mask'), dtype=bool, mode='w+', shape=(self.n,))
+        mask[:] = value
+
+        return mask
+
+    def slices(self, chunk_size=CHUNK_SIZE):
+        for start in range(0, self.n, chunk_size):
+            yield slice(start, min(start + chunk_size, self.n))
+
+
+def _resolve_dtype(current, new):
+    if current is None or not (pd.api.types.is_numeric_dtype(current) and pd.api.types.is_numeric_dtype(new)):
+        return new if current is None else current
+
+    return np.result_type(current, new)
+
+
+def project(filepath, folder, chunk_size=CHUNK_SIZE):
+    """
+    Primeira leitura do CSV: grava a projeção e retorna os tipos numéricos de cada
+    coluna considerando todos os blocos (um bloco pode ter só inteiros e outro decimais).
+    """
+    projection = Projection(folder)
+    dtypes = {}
+
+    for chunk in pd.read_csv(filepath, chunksize=chunk_size):
+        for col, dtype in chunk.dtypes.items():
+            dtypes[col] = _resolve_dtype(dtypes.get(col), dtype)
+
+        chunk['date'] = pd.to_datetime(chunk['date'], format='%Y%m%dT%H%M%S')
+        chunk['season'] = pd.Categorical(features.season_from_date(chunk['date']), categories=features.SEASONS).codes
+        chunk['date'] = chunk['date'].to_numpy(dtype='datetime64[ns]').view('int64')
+        projection.append(chunk)
+
+    projection.close()
+    dtypes = {col: dtype for col, dtype in dtypes.items() if pd.api.types.is_numeric_dtype(dtype)}
+
+    return projection, dtypes
+
+
+def remove_outliers(projection, keep, method='exact', relative_accuracy=RELATIVE_ACCURACY,
+                    chunk_size=CHUNK_SIZE, factor=2):
+    """
+    Mesma regra de ``pipeline.remove_outliers``: cada coluna, em ordem, é filtrada pelo
+    intervalo interquartil calculado sobre as linhas que sobraram das colunas anteriores.
+    Retorna a máscara e os limites de cada coluna.
+    """
+    bounds = {}
+    for col in pipeline.OUTLIER_COLS:
+        values = projection.columns[col]
+
+        def chunks():
+            for part in projection.slices(chunk_size):
+                selected = values[part][keep[part]]
+                yield np.zeros(selected.shape[0], dtype='int64'), selected
+
+        quantiles = grouped_quantiles(chunks, [0.25, 0.75], method, relative_accuracy)
+        q25, q75 = quantiles.loc[0, 0.25], quantiles.loc[0, 0.75]
+        trash_hold = (q75 - q25) * factor
+        lower, upper = q25 - trash_hold, q75 + trash_hold
+        bounds[col] = (float(lower), float(upper))
+
+        for part in projection.slices(chunk_size):
+            keep[part] &= (values[part] > lower) & (values[part] < upper)
+
+    return keep, bounds
+
+
+def deduplicate(projection, keep, chunk_size=CHUNK_SIZE):
+    """
+    Mantém apenas a venda mais recente de cada ``id`` (em empate de data, a última do
+    arquivo). Guarda em memória uma linha por ``id`` distinto.
+    """
+    latest = pd.DataFrame({'date': pd.Series(dtype='int64'), 'pos': pd.Series(dtype='int64')})
+
+    for part in projection.slices(chunk_size):
+        selected = keep[part]
+        chunk = pd.DataFrame({
+            'id': projection.columns['id'][part][selected],
+            'date': projection.columns['date'][part][selected],
+            'pos': np.arange(part.start, part.stop)[selected],
+        })
+        chunk = chunk.sort_values(['date', 'pos']).drop_duplicates('id', keep='last').set_index('id')
+
+        # Blocos posteriores vencem empates de data
+        current = latest['date'].reindex(chunk.index)
+        replaces = ~(current > chunk['date'])
+        latest = pd.concat([latest.drop(chunk.index[replaces & current.notna()]), chunk[replaces]])
+
+    keep[:] = False
+    keep[np.sort(latest['pos'].to_numpy())] = True
+
+    return keep
+
+
+def compute_medians(projection, keep, method='exact', relative_accuracy=RELATIVE_ACCURACY, chunk_size=CHUNK_SIZE):
+    """
+    Mesmas medianas de ``pipeline.compute_medians``, calculadas bloco a bloco.
+    """
+    columns = projection.columns
+    medians = {}
+
+    def zipcode_chunks():
+        for part in projection.slices(chunk_size):
+            selected = keep[part]
+            yield columns['zipcode'][part][selected], columns['price'][part][selected]
+
+    zipcode = grouped_quantiles(zipcode_chunks, [0.5], method, relative_accuracy, midpoint=True)[0.5]
+    medians['zipcode'] = zipcode.rename('price').rename_axis('zipcode')
+
+    def zipcode_season_chunks():
+        for part in projection.slices(chunk_size):
+            zipcodes, price = columns['zipcode'][part], columns['price'][part]
+            zip_median = medians['zipcode'].reindex(zipcodes).to_numpy()
+            buy = keep[part] & (features.buy_status(price, zip_median, columns['condition'][part]) == 'Buy')
+            yield zipcodes[buy] * len(features.SEASONS) + columns['season'][part][buy], price[buy]
+
+    zipcode_season = grouped_quantiles(zipcode_season_chunks, [0.5], method, relative_accuracy, midpoint=True)[0.5]
+    zipcode, season = np.divmod(zipcode_season.index.to_numpy(), len(features.SEASONS))
+    index = pd.MultiIndex.from_arrays([zipcode, np.asarray(features.SEASONS, dtype=object)[season]],
+                                      names=['zipcode', 'season'])
+    medians['zipcode_season'] = pd.Series(zipcode_season.to_numpy(), index=index, name='price').sort_index()
+
+    return medians
+
+
+def score(filepath, keep, medians, dtypes, output, chunk_size=CHUNK_SIZE):
+    """
+    Segunda leitura do CSV: limpa, pontua e grava cada bloco nos arquivos de saída.
+    Retorna (imóveis, recomendados para compra).
+    """
+    os.makedirs(output, exist_ok=True)
+    paths = [os.path.join(output, name) for name in ['recommended_houses.csv', 'report1.csv', 'report2.csv']]
+
+    rows = buy = 0
+    offset = 0
+    for chunk in pd.read_csv(filepath, chunksize=chunk_size, dtype=dtypes):
+        selected = np.asarray(keep[offset:offset + chunk.shape[0]])
+        offset += chunk.shape[0]
+        if not selected.any():
+            continue
+
+        data = chunk.loc[selected].drop(columns=pipeline.DROP_COLS, errors='ignore')
+        data.index = pd.RangeIndex(rows, rows + data.shape[0])
+        data['date'] = pd.to_datetime(data['date'], format='%Y%m%dT%H%M%S')
+        data = features.add_house_features(data)
+        data = features.add_date_features(data)
+
+        data = pipeline.score(data, medians)
+        report1, report2 = pipeline.build_reports(data, medians)
+
+        header = rows == 0
+        mode = 'w' if header else 'a'
+        data.drop(columns=['valor_m2']).to_csv(paths[0], mode=mode, header=header, date_format='%Y-%m-%d')
+        report1.to_csv(paths[1], mode=mode, header=header, date_format='%Y-%m-%d')
+        report2.to_csv(paths[2], mode=mode, header=header)
+
+        rows += data.shape[0]
+        buy += report1.shape[0]
+
+    return rows, buy
+
+
+def run(filepath, output, method='exact', relative_accuracy=RELATIVE_ACCURACY, chunk_size=CHUNK_SIZE, workdir=None):
+    timings = {}
+
+    with tempfile.TemporaryDirectory(dir=workdir) as folder:
+        with pipeline.timed('project', timings):
+            projection, dtypes = project(filepath, folder, chunk_size)
+
+        with pipeline.timed('clean', timings):
+            keep = projection.new_mask('keep')
+            keep, bounds = remove_outliers(projection, keep, method, relative_accuracy, chunk_size)
+            keep = deduplicate(projection, keep, chunk_size)
+
+        with pipeline.timed('medians', timings):
+            medians = compute_medians(projection, keep, method, relative_accuracy, chunk_size)
+
+        with pipeline.timed('score', timings):
+            rows, buy = score(filepath, keep, medians, dtypes, output, chunk_size)
+            pipeline.save_state(output, bounds, medians)
+
+        del keep, projection
+
+    # O insights.json precisa da base inteira em memória: o dashboard o recalcula
+    # sob demanda (insights.load_insights) em vez de exibir um resumo desatualizado
+    insights_path = os.path.join(output, 'insights.json')
+    if os.path.exists(insights_path):
+        os.remove(insights_path)
+
+    print(f'Total: {sum(timings.values()):.3f}s | {rows} imóveis | {buy} recomendados para compra ({method})')
+
+    return timings
@@ -0,0 +1,244 @@
+"""
+Métricas de resumo (count, média, desvio padrão, mín., mediana, máx. e, nas
+categóricas, únicos/top/freq) calculadas em uma passada e combináveis.
+
+``SummaryIndex`` guarda parciais por partição (uma combinação de valores das
+colunas categóricas filtráveis: status, zipcode, season, ...): contagem, soma,
+soma dos quadrados dos desvios (M2), mín., máx. e contagem de cada categoria.
+Resumir um filtro é combinar as parciais das partições selecionadas (fórmula de
+Chan para a variância): contagens, médias, desvios, extremos e categóricas não
+percorrem as linhas. A mediana não é combinável: as linhas ficam agrupadas por
+partição (um array de posições) e a mediana lê apenas os valores das partições
+selecionadas (seleção do k-ésimo com ``np.partition``), num custo proporcional ao
+tamanho da seleção. A mediana do dataset inteiro é pré-calculada.
+
+Filtros de intervalo que não excluem nenhum imóvel das partições selecionadas
+(o padrão dos sliders) também são respondidos pelas parciais. Nos demais casos,
+``for_filters`` retorna ``None`` e o resumo é feito em uma passada sobre o recorte
+filtrado (``summarize``).
+"""
+import numpy as np
+import pandas as pd
+
+from house_rocket import filters, schema
+
+# Identificadores e coordenadas não entram no resumo das numéricas
+EXCLUDE = ['id', 'lat', 'long', 'grade']
+
+NUMERIC_STATS = ['count', 'mean', 'std', 'min', '50%', 'max']
+
+CATEGORICAL_STATS = ['count', 'unique', 'top', 'freq']
+
+
+class Summary:
+    """
+    Resumo de um recorte: ``numeric`` e ``categorical`` no formato de ``DataFrame.describe``.
+    """
+    def __init__(self, count, numeric, categorical):
+        self.count = count
+        self.numeric = numeric
+        self.categorical = categorical
+
+    def mean(self, col):
+        return self.numeric.loc['mean', col]
+
+
+class SummaryIndex:
+    """
+    Parciais das métricas de resumo por partição de um dataframe.
+
+    :param data: O dataframe compacto (``store``) ou um recorte expandido.
+    :type data: DataFrame
+    :param partition_cols: Colunas categóricas que definem as partições; vazia resume o dataframe inteiro.
+    :type partition_cols: list
+    :param range_cols: Colunas de intervalo cujo máximo por partição é guardado.
+    :type range_cols: list
+    """
+    def __init__(self, data, partition_cols=filters.CATEGORY_COLS, range_cols=filters.RANGE_COLS):
+        frame = schema.expand(data)
+        columns = {col: frame[col] for col in frame.columns}
+        columns['renovated'] = frame['yr_renovated'] > 0
+
+        self.partition_cols = list(partition_cols)
+        self.categorical_cols = [col for col in schema.CATEGORICAL if col in frame.columns]
+        self.numeric_cols = [col for col in frame.drop(columns=self.categorical_cols).select_dtypes(include='number')
+                             if col not in EXCLUDE]
+
+        if self.partition_cols:
+            keys = pd.DataFrame({col: columns[col] for col in self.partition_cols})
+            codes = keys.groupby(self.partition_cols, observed=True, sort=False).ngroup().to_numpy()
+            _, first = np.unique(codes, return_index=True)
+            self._keys = keys.iloc[first].reset_index(drop=True)
+        else:
+            codes = np.zeros(frame.shape[0], dtype='int64')
+            self._keys = pd.DataFrame(index=range(1 if frame.shape[0] else 0))
+        self.n_partitions = self._keys.shape[0]
+        self._rows = np.bincount(codes, minlength=self.n_partitions)
+
+        # Posições das linhas agrupadas por partição: as da partição p são
+        # _positions[_offsets[p]:_offsets[p + 1]]
+        self._positions = np.argsort(codes, kind='stable').astype('int32')
+        self._offsets = np.concatenate([[0], np.cumsum(self._rows)])
+
+        # Parciais das numéricas (partições x colunas). Os valores (lidos na mediana) são
+        # os arrays do próprio dataset, sem cópia
+        shape = (self.n_partitions, len(self.numeric_cols))
+        self._count = np.zeros(shape, dtype='int32')
+        self._sum, self._m2 = np.zeros(shape), np.zeros(shape)
+        self._min, self._max = np.full(shape, np.inf), np.full(shape, -np.inf)
+        self._values = {col: columns[col].to_numpy() for col in self.numeric_cols}
+        self._median = np.full(len(self.numeric_cols), np.nan)
+        for j, col in enumerate(self.numeric_cols):
+            values = self._values[col].astype('float64')
+            valid = ~np.isnan(values)
+            part, values = codes[valid], values[valid]
+
+            self._count[:, j] = np.bincount(part, minlength=self.n_partitions)
+            self._sum[:, j] = np.bincount(part, values, minlength=self.n_partitions)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = self._sum[:, j] / self._count[:, j]
+            self._m2[:, j] = np.bincount(part, (values - mean[part]) ** 2, minlength=self.n_partitions)
+            np.minimum.at(self._min[:, j], part, values)
+            np.maximum.at(self._max[:, j], part, values)
+            if values.size:
+                self._median[j] = np.median(values)
+
+        # Contagem de cada categoria por partição (partições x categorias). Nas colunas que
+        # definem as partições, basta a categoria de cada partição
+        self._categories = {}
+        for col in self.categorical_cols:
+            series = columns[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                labels, values = series.cat.categories, series.cat.codes.to_numpy()
+            else:
+                values, labels = pd.factorize(series, sort=True)
+            if col in self.partition_cols:
+                category = np.full(self.n_partitions, -1, dtype='int32')
+                category[codes] = values
+                self._categories[col] = (np.asarray(labels), category)
+                continue
+            valid = values >= 0
+            counts = np.bincount(codes[valid] * len(labels) + values[valid], minlength=self.n_partitions * len(labels))
+            self._categories[col] = (np.asarray(labels), counts.reshape(self.n_partitions, len(labels)).astype('int32'))
+
+        # Máximo das colunas de intervalo por partição: o filtro é inócuo se o limite o cobre
+        self._range_max = {}
+        for col in range_cols:
+            if col in columns:
+                maxima = pd.Series(columns[col].to_numpy()).groupby(codes).max()
+                self._range_max[col] = maxima.reindex(range(self.n_partitions)).to_numpy()
+
+    @property
+    def nbytes(self):
+        # Não inclui os valores das colunas, compartilhados com o dataset
+        arrays = [self._rows, self._positions, self._offsets, self._count, self._sum, self._m2, self._min, self._max,
+                  self._median, *self._range_max.values()]
+        arrays += [counts for _, counts in self._categories.values()]
+
+        return sum(array.nbytes for array in arrays) + int(self._keys.memory_usage(deep=True).sum())
+
+    def partitions(self, filters):
+        """
+        Retorna a máscara das partições selecionadas pelos filtros ou ``None`` se algum
+        filtro não puder ser respondido pelas partições (ex.: um limite de preço que
+        exclui imóveis).
+
+        :param filters: Dicionário coluna -> limite superior (intervalo) ou lista de valores (categoria).
+        :type filters: dict
+        """
+        selected = np.ones(self.n_partitions, dtype=bool)
+        for col, value in filters.items():
+            if col in self.partition_cols:
+                selected &= self._keys[col].isin(list(value)).to_numpy()
+            elif col not in self._range_max:
+                return None
+
+        for col, value in filters.items():
+            if col in self.partition_cols:
+                continue
+            maxima = self._range_max[col][selected]
+            if maxima.size and np.asarray(value).astype(maxima.dtype) < maxima.max():
+                return None
+
+        return selected
+
+    def for_filters(self, filters):
+        """
+        Retorna o ``Summary`` do recorte filtrado combinando as parciais, ou ``None``
+        quando os filtros exigem percorrer as linhas (use ``summarize``).
+        """
+        selected = self.partitions(filters)
+        if selected is None:
+            return None
+
+        return self.summary(selected)
+
+    def _selected_median(self, selected):
+        # Posições das linhas das partições selecionadas, sem percorrer as demais
+        starts, lengths = self._offsets[:-1][selected], self._rows[selected]
+        steps = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        positions = self._positions[steps + np.arange(lengths.sum())]
+
+        median = np.full(len(self.numeric_cols), np.nan)
+        for j, col in enumerate(self.numeric_cols):
+            values = self._values[col][positions].astype('float64')
+            values = values[~np.isnan(values)]
+            if values.size:
+                middle = [(values.size - 1) // 2, values.size // 2]
+                median[j] = np.partition(values, middle)[middle].mean()
+
+        return median
+
+    def summary(self, selected=None):
+        """
+        Combina as parciais das partições selecionadas.
+
+        :param selected: Máscara das partições; ``None`` seleciona todas.
+        :type selected: ndarray
+        """
+        everything = selected is None or selected.all()
+        selected = np.ones(self.n_partitions, dtype=bool) if selected is None else selected
+
+        count = self._count[selected]
+        total = count.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self._sum[selected].sum(axis=0) / total
+            partition_mean = self._sum[selected] / count
+            deviation = np.where(count > 0, count * (partition_mean - mean) ** 2, 0)
+            std = np.sqrt((self._m2[selected].sum(axis=0) + deviation.sum(axis=0)) / (total - 1))
+
+        minimum = self._min[selected].min(axis=0, initial=np.inf)
+        maximum = self._max[selected].max(axis=0, initial=-np.inf)
+        median = self._median if everything else self._selected_median(selected)
+
+        empty = total == 0
+        numeric = pd.DataFrame(
+            [total, mean, np.where(total > 1, std, np.nan), np.where(empty, np.nan, minimum), median,
+             np.where(empty, np.nan, maximum)],
+            index=NUMERIC_STATS, columns=self.numeric_cols)
+
+        categorical = {}
+        for col, (labels, counts) in self._categories.items():
+            if counts.ndim == 1:
+                category, rows = counts[selected], self._rows[selected]
+                counts = np.bincount(category[category >= 0], rows[category >= 0], minlength=len(labels))
+            else:
+                counts = counts[selected].sum(axis=0)
+            n = int(counts.sum())
+            # Empate: a primeira categoria na ordem das categorias (como value_counts)
+            top = counts.argmax() if n else None
+            categorical[col] = [n, int((counts > 0).sum()), labels[top] if n else np.nan, int(counts[top]) if n else np.nan]
+
+        categorical = pd.DataFrame(categorical, index=CATEGORICAL_STATS, columns=self.categorical_cols)
+
+        return Summary(int(self._rows[selected].sum()), numeric, categorical)
+
+
+def summarize(data):
+    """
+    Retorna o ``Summary`` de um dataframe em uma passada (sem partições).
+
+    :param data: O recorte a ser resumido.
+    :type data: DataFrame
+    """
+    return SummaryIndex(data, partition_cols=[], range_cols=[]).summary()
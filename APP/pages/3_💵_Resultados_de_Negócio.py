@@ -1,18 +1,13 @@
 import pandas as pd
 import streamlit as st
-import plotly.express as px
 
 from datetime import datetime
 
-from PIL import Image
+from house_rocket import figures, lazy, maps, profiling, schema, store
 
-# Read data
-@st.cache(allow_output_mutation=True)
-def get_data( filepath ):
-    data = pd.read_csv( filepath, index_col=0, parse_dates=['date'] )
-    data = data[data['status'] == 'Buy'].copy()
-
-    return data
+# Importados apenas quando um gráfico não está no cache
+px = lazy.lazy_import('plotly.express')
+Image = lazy.lazy_import('PIL.Image')
 
 def main():
     st.set_page_config(layout='wide', page_title='Resultados de Negócio | Dashboard de Insights da House Rocket', page_icon=':dollar:')
@@ -26,12 +21,9 @@ def main():
 
     # ETL
     ## Extract
-    filepath = 'data/recommended_houses.csv'
-        
-    data = get_data(filepath)
-
-    ## Transform
-    #data = data_transform(data)
+    with profiling.section('carregamento'):
+        data = store.get_dataset('recommended_buy')
+    key = (store.version('recommended_buy'),)
 
     ## Load
     st.write(f'Nesta seção são mostrados os ganhos experados com a COMPRA e VENDA dos {data.shape[0]} imóveis recomendados nesta análise de negócio, e com os conhecimentos extraídos na validação de hipóteses de negócio.')
@@ -48,33 +40,69 @@ def main():
     st.subheader('100 melhores negócios')
     c1, c2 = st.columns(2)
 
-    with c1:
-        df = data.sort_values(by='Profit')[:100]
-        fig = px.scatter_mapbox( df,
-            lat='lat',
-            lon='long',
-            color='price',
-            size='Profit',
-            color_continuous_scale=px.colors.cyclical.IceFire,
-            size_max=15,
-            zoom=9.5 )
-
-        fig.update_layout( mapbox_style='open-street-map' )
-        fig.update_layout( height=600, margin={'r': 0, 'l': 0, 'b': 0, 't': 0})
-        st.plotly_chart(fig)
+    with c1, profiling.section('mapa dos 100 melhores'):
+        # Maiores lucros, pelo índice pré-calculado (sem ordenar o dataset a cada execução)
+        df = store.get_dataset('recommended_buy_deals').top(100)
+
+        def build_best_deals_map():
+            points, aggregated = maps.level_of_detail(df, ['price', 'Profit'])
+            fig = px.scatter_mapbox( points,
+                lat='lat',
+                lon='long',
+                color='price',
+                size='Profit',
+                hover_data=['imóveis'] if aggregated else None,
+                custom_data=None if aggregated else ['id'],
+                color_continuous_scale=px.colors.cyclical.IceFire,
+                size_max=15,
+                zoom=9.5 )
+
+            fig.update_layout( mapbox_style='open-street-map' )
+            fig.update_layout( height=600, margin={'r': 0, 'l': 0, 'b': 0, 't': 0})
+            return fig
+
+        # Clique num imóvel: mostra os comparáveis abaixo
+        event = figures.plotly_chart(st, 'mapa dos 100 melhores', key, build_best_deals_map,
+                                     on_select='rerun', selection_mode='points')
     with c2:
-        st.dataframe(df, height=600)
+        st.dataframe(schema.expand(df), height=600)
+
+    st.subheader('Imóveis comparáveis')
+    with profiling.section('comps'):
+        points = [point for point in event.selection.points if point.get('customdata')]
+        if points:
+            house_id = points[0]['customdata'][0]
+        else:
+            house_id = st.selectbox('Imóvel', options=df['id'], index=None,
+                                    placeholder='Clique num imóvel do mapa ou escolha o id')
+
+        if house_id is not None:
+            house = df.loc[df['id'] == house_id].iloc[0]
+            house_comps = store.get_dataset('comps').lookup(int(house_id))
+
+            c1, c2 = st.columns((1, 3))
+            c1.metric(label=f'Imóvel {house_id}', value=f"${house['price']:,.2f}")
+            if house_comps.shape[0] > 0:
+                estimate = (house_comps['price'] / house_comps['sqft_living']).median() * house['sqft_living']
+                c1.metric(label=f'Preço estimado por {house_comps.shape[0]} comps', value=f'${estimate:,.2f}',
+                          delta=f"{(estimate / house['price'] - 1) * 100:.1f}%")
+            c2.dataframe(house_comps[['distance_km', 'id', 'date', 'price', 'sqft_living', 'grade', 'bedrooms', 'zipcode']],
+                         hide_index=True)
 
     st.subheader('Total de imóveis vendidos por dia e por sazonalidade')
-    df_2 = data.groupby(['date', 'season']).agg({'id': 'count'})
-    df_2 = df_2['2014-06-01':].reset_index()
-    fig2 = px.line(df_2, x='date', y='id', color='season', labels={
-        'id': 'Quantidade',
-        'date': 'Data',
-        'season': 'Estação do Ano'
-    })
-    fig2.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 0})
-    st.plotly_chart(fig2, use_container_width=True)
+    with profiling.section('vendas por dia e estação'):
+        def build_sales_by_day():
+            df_2 = data.groupby(['date', 'season'], observed=True).agg({'id': 'count'})
+            df_2 = df_2['2014-06-01':].reset_index()
+            fig2 = px.line(df_2, x='date', y='id', color='season', labels={
+                'id': 'Quantidade',
+                'date': 'Data',
+                'season': 'Estação do Ano'
+            })
+            fig2.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 0})
+            return fig2
+
+        figures.plotly_chart(st, 'vendas por dia e estação', key, build_sales_by_day, use_container_width=True)
 
     with st.sidebar:
         st.markdown('# Sobre')
@@ -82,6 +110,10 @@ def main():
         st.markdown('Se você quiser procurar por mais informações sobre este projeto ou entrar em contato comigo, consulte meu [Portfólio de Projetos](https://gustavobarros11.github.io/) ou [Github](https://github.com/GustavoBarros11).')
         st.markdown('___')
 
+    # Página já enviada: carrega em segundo plano o que as outras páginas usam
+    lazy.warm_up()
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    with profiling.profile_run('Resultados de Negócio'):
+        main()
\ No newline at end of file
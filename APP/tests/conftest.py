@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+from house_rocket import schema
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SOURCE_PATH = os.path.join(APP_DIR, '..', 'kc_house_data.csv')
+
+HOUSES_PATH = os.path.join(APP_DIR, 'data', 'recommended_houses.csv')
+
+
+@pytest.fixture(scope='session')
+def houses():
+    # O dataframe compacto, como é carregado pelo store
+    return schema.read_houses(HOUSES_PATH, index_col=0)
+
+
+@pytest.fixture(scope='session')
+def source_path():
+    if not os.path.exists(SOURCE_PATH):
+        pytest.skip('kc_house_data.csv não encontrado')
+
+    return SOURCE_PATH
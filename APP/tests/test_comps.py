@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from house_rocket import comps, features, pipeline
+
+
+@pytest.fixture(scope='module')
+def index(source_path):
+    data = pipeline.clean(pipeline.ingest(source_path))
+    data = features.add_date_features(features.add_house_features(data))
+
+    return comps.CompsIndex(data)
+
+
+@pytest.fixture(scope='module')
+def bulk(index):
+    return index.bulk()
+
+
+def test_bulk_matches_brute_force(index, bulk):
+    positions, distances = bulk
+    sample = np.random.default_rng(0).choice(index.data.shape[0], 300, replace=False)
+
+    # Todos os imóveis como candidatos, sem a grade (as posições só diferem em empates)
+    _, expected = index._nearest(sample, np.arange(index.data.shape[0]), comps.K, comps.MAX_DISTANCE_KM)
+
+    np.testing.assert_array_equal(distances[sample], expected)
+
+
+def test_comps_are_past_sales_of_other_houses(index, bulk):
+    positions, _ = bulk
+    found = positions >= 0
+    subjects = np.broadcast_to(np.arange(positions.shape[0])[:, None], positions.shape)[found]
+    candidates = positions[found]
+
+    age = index.data['date'].to_numpy()[subjects] - index.data['date'].to_numpy()[candidates]
+    assert (age >= np.timedelta64(0, 'D')).all()
+    assert (age <= np.timedelta64(comps.MAX_AGE_DAYS, 'D')).all()
+    assert (index.data['id'].to_numpy()[subjects] != index.data['id'].to_numpy()[candidates]).all()
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from house_rocket import filters, schema
+
+
+def random_filters(data, rng):
+    # Um estado aleatório da barra lateral: alguns filtros de categoria e limites de intervalo
+    state = {}
+    if rng.random() < 0.5:
+        state['status'] = ['Buy']
+    for col in ['zipcode', 'season']:
+        if rng.random() < 0.5:
+            values = data[col].unique()
+            state[col] = list(rng.choice(values, size=rng.integers(1, 4), replace=False))
+    for col in filters.RANGE_COLS:
+        if rng.random() < 0.7:
+            state[col] = data[col].iloc[rng.integers(0, data.shape[0])]
+    for col in ['waterfront', 'has_basement']:
+        if rng.random() < 0.2:
+            state[col] = [1]
+    if rng.random() < 0.2:
+        state['renovated'] = [True]
+
+    return state
+
+
+def mask_chain(data, state):
+    # A filtragem original da página: uma máscara booleana por filtro sobre o dataframe expandido
+    data = data.assign(renovated=data['yr_renovated'] > 0)
+    for col, value in state.items():
+        if col in filters.RANGE_COLS:
+            data = data.loc[data[col] <= value]
+        else:
+            data = data.loc[data[col].isin(value)]
+
+    return data.drop(columns=['renovated'])
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_engine_matches_mask_chain(houses, seed):
+    rng = np.random.default_rng(seed)
+    expanded = schema.expand(houses)
+    state = random_filters(expanded, rng)
+
+    engine = filters.FilterEngine(houses)
+    expected = mask_chain(expanded, state)
+
+    pd.testing.assert_frame_equal(schema.expand(engine.apply(state)), expected)
+    if expected.shape[0]:
+        assert engine.bounds('price', state) == (expected['price'].min(), expected['price'].max())
+    assert set(engine.unique('zipcode', state)) == set(expected['zipcode'])
+
+
+def test_cached_masks_are_reused(houses):
+    engine = filters.FilterEngine(houses)
+    state = {'status': ['Buy'], 'price': 500000}
+
+    first = engine.apply(state)
+    state['season'] = ['summer']
+    engine.apply(state)
+
+    assert engine.apply({'status': ['Buy'], 'price': 500000}) is first
@@ -0,0 +1,66 @@
+import os
+
+import pandas as pd
+import pytest
+
+from house_rocket import features, incremental, pipeline
+
+OUTPUTS = ['recommended_houses.csv', 'report1.csv', 'report2.csv', 'insights.json', 'pipeline_state.json']
+
+
+def full_run(filepath, output, bounds):
+    # pipeline.run com os limites de outliers fixos, como na atualização incremental
+    data = pipeline.clean(pipeline.ingest(filepath), bounds)
+    data = features.add_date_features(features.add_house_features(data))
+    medians = pipeline.compute_medians(data)
+    data = pipeline.score(data, medians)
+    report1, report2 = pipeline.build_reports(data, medians)
+
+    pipeline.write_outputs(output, data, report1, report2)
+    pipeline.save_state(output, bounds, medians)
+
+
+def read_outputs(folder):
+    outputs = {}
+    for name in OUTPUTS:
+        with open(os.path.join(folder, name), 'rb') as f:
+            outputs[name] = f.read()
+
+    return outputs
+
+
+@pytest.fixture(scope='module')
+def batches(source_path, tmp_path_factory):
+    # Vendas até abril de 2015 e dois lotes de vendas novas: o primeiro de poucos zipcodes,
+    # o segundo com o restante (os dois com revendas de ids antigos)
+    source = pd.read_csv(source_path, dtype={'date': str})
+    folder = tmp_path_factory.mktemp('sales')
+    new = source['date'] > '20150415'
+    few = source['zipcode'].isin(source['zipcode'].unique()[:8])
+    cuts = [~new, new & few, new & ~few]
+
+    paths = []
+    for i, cut in enumerate(cuts):
+        paths.append(os.path.join(folder, f'sales_{i}.csv'))
+        pd.concat([source.loc[c] for c in cuts[:i + 1]]).to_csv(paths[-1], index=False)
+        if i:
+            # O lote contém apenas as vendas novas
+            source.loc[cut].to_csv(os.path.join(folder, f'new_{i}.csv'), index=False)
+
+    return folder, paths
+
+
+def test_incremental_update_matches_full_recompute(batches, tmp_path):
+    folder, paths = batches
+    output = str(tmp_path / 'incremental')
+    pipeline.run(paths[0], output)
+    bounds = pipeline.load_state(output)['outlier_bounds']
+
+    for i, path in enumerate(paths[1:], start=1):
+        affected = incremental.update(os.path.join(folder, f'new_{i}.csv'), output)
+        if i == 1:
+            assert len(affected) == 8
+
+        expected = str(tmp_path / f'full_{i}')
+        full_run(path, expected, bounds)
+        assert read_outputs(output) == read_outputs(expected)
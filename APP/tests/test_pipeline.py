@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from house_rocket import pipeline, streaming
+
+OUTPUTS = ['recommended_houses.csv', 'report1.csv', 'report2.csv', 'pipeline_state.json']
+
+
+def read_outputs(folder, names=OUTPUTS):
+    outputs = {}
+    for name in names:
+        with open(os.path.join(folder, name), 'rb') as f:
+            outputs[name] = f.read()
+
+    return outputs
+
+
+@pytest.fixture(scope='module')
+def serial(source_path, tmp_path_factory):
+    output = tmp_path_factory.mktemp('serial')
+    pipeline.run(source_path, str(output))
+
+    return read_outputs(output, OUTPUTS + ['insights.json'])
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_workers_match_serial_run(source_path, serial, tmp_path, workers):
+    pipeline.run(source_path, str(tmp_path), workers=workers)
+
+    assert read_outputs(tmp_path, OUTPUTS + ['insights.json']) == serial
+
+
+@pytest.mark.parametrize('chunk_size', [streaming.CHUNK_SIZE, 5_000])
+def test_streaming_exact_matches_serial_run(source_path, serial, tmp_path, chunk_size):
+    # O modo streaming não gera o insights.json (precisa do dataframe inteiro)
+    streaming.run(source_path, str(tmp_path), 'exact', chunk_size=chunk_size)
+
+    assert read_outputs(tmp_path) == {name: serial[name] for name in OUTPUTS}
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from house_rocket import filters, schema, summary
+
+
+def random_filters(data, rng):
+    # Filtros de categoria aleatórios e limites de intervalo inócuos (o padrão dos sliders)
+    # ou aleatórios (que exigem percorrer as linhas)
+    state = {}
+    for col in ['status', 'zipcode', 'season']:
+        if rng.random() < 0.5:
+            values = data[col].unique()
+            state[col] = list(rng.choice(values, size=rng.integers(1, min(4, values.size + 1)), replace=False))
+    for col in ['waterfront', 'has_basement']:
+        if rng.random() < 0.2:
+            state[col] = [1]
+    if rng.random() < 0.2:
+        state['renovated'] = [True]
+    for col in filters.RANGE_COLS:
+        if rng.random() < 0.5:
+            state[col] = data[col].max() if rng.random() < 0.7 else data[col].iloc[rng.integers(0, data.shape[0])]
+
+    return state
+
+
+def describe(data):
+    # Referência: DataFrame.describe nas numéricas e nas categóricas
+    categorical = [col for col in schema.CATEGORICAL if col in data.columns]
+    numeric = data.drop(columns=categorical).select_dtypes(include='number').describe()
+    numeric = numeric.drop(index=['25%', '75%'], columns=summary.EXCLUDE)
+
+    return numeric, data[categorical].astype({col: 'category' for col in categorical}).describe()
+
+
+@pytest.fixture(scope='module')
+def engine(houses):
+    return filters.FilterEngine(houses)
+
+
+@pytest.fixture(scope='module')
+def index(houses):
+    return summary.SummaryIndex(houses)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_summary_matches_describe(engine, index, seed):
+    state = random_filters(schema.expand(engine.data), np.random.default_rng(seed))
+    data = schema.expand(engine.apply(state))
+
+    result = index.for_filters(state)
+    if result is None:
+        result = summary.summarize(data)
+
+    assert result.count == data.shape[0]
+    if data.shape[0]:
+        numeric, categorical = describe(data)
+        np.testing.assert_allclose(result.numeric.to_numpy(float), numeric.to_numpy(float), rtol=1e-6)
+        pd.testing.assert_frame_equal(result.categorical.astype(str), categorical.astype(str))
+
+
+def test_default_sliders_use_the_partitions(houses, index):
+    expanded = schema.expand(houses)
+    state = {'status': ['Buy'], 'season': ['summer', 'winter']}
+    state.update({col: expanded[col].max() for col in filters.RANGE_COLS})
+
+    assert index.for_filters(state) is not None
+    assert index.for_filters({'price': expanded['price'].min()}) is None
@@ -1,85 +1,61 @@
 import numpy as np
 import pandas as pd
 import streamlit as st
-import plotly.express as px
-import folium
-import geopandas
 
 from datetime import datetime
-from folium.plugins import MarkerCluster
-from streamlit_folium import folium_static
-from PIL import Image
-
-# Read data
-@st.cache(allow_output_mutation=True)
-def get_data( filepath ):
-    data = pd.read_csv( filepath, index_col=0 )
-
-    return data
-
-@st.cache(allow_output_mutation=True)
-def data_transform(data):
-    # Convertendo variável date de object para datetime
-    data['date'] = pd.to_datetime(data['date'])
-
-    # Convertendo variáveis do tipo numérico para categórico
-    data['month'] = data['month'].astype('category')
-    data['has_basement'] = data['has_basement'].astype('category')
-    data['new_house'] = data['new_house'].astype('category')
-    data['condition'] = data['condition'].astype('category')
-    data['waterfront'] = data['waterfront'].astype('category')
-    data['view'] = data['view'].astype('category')
-
-    # criando variável metro quadrado
-    data['valor_m2'] = data.apply(lambda x: x['price']/x['sqft_lot'], axis=1)
-
-    return data
-
-@st.cache( allow_output_mutation=True )
-def get_geofile( url ):
-    try:
-        geofile = geopandas.read_file( url )
-
-        return geofile
-    except:
-        return None
 
-@st.cache
-def convert_df_csv(df):
-    # IMPORTANT: Cache the conversion to prevent computation on every rerun
-    return df.to_csv()
-
-@st.cache
-def convert_df_excel(df):
-    # IMPORTANT: Cache the conversion to prevent computation on every rerun
-    return df.to_excel('data.xlsx')
-
-@st.cache
-def convert_df_json(df):
-    # IMPORTANT: Cache the conversion to prevent computation on every rerun
-    return df.to_json()
-
-def plot_distribution_of_variable(df, col):
-    # data plot
-    fig = px.histogram( df, x=col, title='Qtd. de Imóveis por Faixa de Preço', color_discrete_sequence=["#8d3941"], labels={
-        'price': 'Preço do imóvel (USD)',
-        'count': 'Total de Imóveis (Und)'
-    }, height=290 )
-    fig.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 40})
-    st.plotly_chart( fig, use_container_width=True )
-
-def plot_bar_chart(df, col1, col2):
-    df_plot = df[[col1, col2]].groupby(col1).mean()
-
-    # data plot
-    fig = px.bar( x=df_plot.index, y=df_plot['price'], title='Preço médio x Grade', color_discrete_sequence=["#8d3941"], labels={
-        'y': 'Preço médio (USD)',
-        'x': 'Grade'
-    }, height=290 )
-    fig.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 40})
-    st.plotly_chart( fig, use_container_width=True )
-
-def price_density_maps( df, geofile ):
+from house_rocket import export, figures, filters as hr_filters, geo, lazy, maps, profiling, ranking, schema, store, \
+    summary as hr_summary
+
+# Dependências pesadas: importadas quando a seção que as usa é renderizada
+px = lazy.lazy_import('plotly.express')
+folium = lazy.lazy_import('folium')
+streamlit_folium = lazy.lazy_import('streamlit_folium')
+Image = lazy.lazy_import('PIL.Image')
+
+def download_data(df, file_name, key, widget_key):
+    # A exportação é feita em blocos e guardada em cache pela chave dos filtros,
+    # sem calcular o hash do dataframe a cada rerun
+    fmt = st.selectbox('Formato', options=list(export.FORMATS), key=f'format_{widget_key}')
+
+    def read_export():
+        # Download adiado: o arquivo só é gerado no clique. Ao servir o download, o
+        # Streamlit mantém os bytes do arquivo em memória
+        with open(export.export(df, fmt, key), 'rb') as f:
+            return f.read()
+
+    st.download_button(f'Download .{fmt}', data=read_export, file_name=f'{file_name}.{fmt}', mime=export.FORMATS[fmt], key=widget_key)
+
+@profiling.timed('histograma de preço')
+def plot_distribution_of_variable(df, col, key):
+    def build():
+        # data plot
+        fig = px.histogram( df, x=col, title='Qtd. de Imóveis por Faixa de Preço', color_discrete_sequence=["#8d3941"], labels={
+            'price': 'Preço do imóvel (USD)',
+            'count': 'Total de Imóveis (Und)'
+        }, height=290 )
+        fig.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 40})
+        return fig
+
+    figures.plotly_chart( st, 'histograma de preço', key, build, use_container_width=True )
+
+@profiling.timed('preço médio x grade')
+def plot_bar_chart(df, col1, col2, key):
+    def build():
+        df_plot = df[[col1, col2]].groupby(col1).mean()
+
+        # data plot
+        fig = px.bar( x=df_plot.index, y=df_plot['price'], title='Preço médio x Grade', color_discrete_sequence=["#8d3941"], labels={
+            'y': 'Preço médio (USD)',
+            'x': 'Grade'
+        }, height=290 )
+        fig.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 40})
+        return fig
+
+    figures.plotly_chart( st, 'preço médio x grade', key, build, use_container_width=True )
+
+@profiling.timed('mapas folium')
+def price_density_maps( df ):
     st.header( 'Visão Geral da Região' )
 
     m1, m2 = st.columns( (1, 1) )
@@ -87,92 +63,112 @@ def price_density_maps( df, geofile ):
     # maps_df = data.copy()
     maps_df = df.loc[df['status'] == 'Buy', :]
 
-    # Base Map - Folium
-    density_map = folium.Map( location=[maps_df['lat'].mean(),
-        maps_df['long'].mean()],
-        default_zoom_start=15 )
-
-    marker_cluster = MarkerCluster().add_to( density_map )
-
-    for name, row in maps_df.iterrows():
-        folium.Marker( [row['lat'], row['long']],
-        popup=f"Price ${row['price']} on: {row['date']}  Features: {row['sqft_living']}" 
-        + f"sqft, {row['bedrooms']} bedrooms, {row['bathrooms']}"
-        + f" bathrooms, year built: {row['yr_built']}" ).add_to( marker_cluster )
+    # Base Map - Folium (marcadores gerados no navegador)
+    density_map = maps.build_cluster_map( maps_df )
     
     m1.subheader( 'Densidade por Região' )
     with m1:
-        folium_static( density_map )
+        profiling.payload( 'mapa de densidade', density_map )
+        streamlit_folium.folium_static( density_map )
 
     # Region Price Map
     m2.subheader( 'Densidade por Preço' )
 
-    df_m2 = maps_df[['price', 'zipcode']].groupby( 'zipcode' ).mean().reset_index()
-    df_m2.columns = ['ZIP', 'PRICE']
+    # Geometrias (arquivo local, simplificado e já filtrado pelos zipcodes do dataset):
+    # lidas só quando o mapa é desenhado, depois do que já foi enviado da página
+    geofile = store.get_dataset( 'zipcodes' )
+    if geofile is None:
+        m2.warning( f'Geometrias dos zipcodes indisponíveis. Gere {geo.ZIPCODES_PATH} com: python -m house_rocket.geo' )
+        return None
 
-    geofile = geofile[geofile['ZIP'].isin( df_m2['ZIP'].tolist() )]
+    # Preço médio por zipcode da versão atual do dataset (as geometrias não guardam preços)
+    df_m2 = geo.region_prices( maps_df, store.get_dataset('zip_prices') )
+
+    approximate = geo.is_approximate( geofile )
+    geofile = geofile.loc[geofile['ZIP'].isin( df_m2['ZIP'] ), ['ZIP', 'geometry']]
 
     region_price_map = folium.Map( location=[df['lat'].mean(),
             df['long'].mean()],
             default_zoom_start=15 )
     
-    region_price_map.choropleth( data = df_m2,
+    # Map.choropleth foi removido do folium: a camada é criada com folium.Choropleth
+    folium.Choropleth( data = df_m2,
         geo_data = geofile,
         columns=['ZIP', 'PRICE'],
         key_on='feature.properties.ZIP',
         fill_color='YlOrRd',
         fill_opacity = 0.7,
         line_opacity = 0.2,
-        legend_name = 'AVG PRICE' )
+        legend_name = 'AVG PRICE' ).add_to( region_price_map )
 
     with m2:
-        folium_static( region_price_map )
+        profiling.payload( 'mapa de preço por região', region_price_map )
+        streamlit_folium.folium_static( region_price_map )
+        if approximate:
+            st.caption( 'Regiões aproximadas, geradas a partir das coordenadas dos imóveis; não são as fronteiras oficiais dos zipcodes.' )
     
     return None
 
-def display_home_page(df, geofile):
+def display_home_page(df, filters):
     col1_1, col1_2, col1_3, col1_4 = st.columns(4)
+
+    with profiling.section('métricas de resumo'):
+        # Combina as parciais por partição; filtros de intervalo ativos exigem uma passada no recorte
+        summary = store.get_dataset('recommended_houses_summary').for_filters(filters)
+        if summary is None:
+            summary = hr_summary.summarize(df)
     
-    col1_1.metric(label="Total de Imóveis", value=df.shape[0], delta="100% dos imóveis")
-    col1_2.metric(label="Recomendados para COMPRA", value=5767, delta=f'{(5767/df.shape[0])*100:.2f}% dos imóveis', delta_color="off")
+    with profiling.section('cards de métricas'):
+        col1_1.metric(label="Total de Imóveis", value=summary.count, delta="100% dos imóveis")
+        recommended = store.get_dataset('recommended_buy').shape[0]
+        col1_2.metric(label="Recomendados para COMPRA", value=recommended, delta=f'{(recommended/summary.count)*100:.2f}% dos imóveis', delta_color="off")
+
+        col1_3.metric(label="Preço Médio dos Imóveis", value=f"${summary.mean('price'):,.2f}")
 
-    col1_3.metric(label="Preço Médio dos Imóveis", value=f"${df['price'].mean():,.2f}")
+        col1_4.metric(label="Preço Médio do M²", value=f"${summary.mean('valor_m2'):,.2f}")
 
-    col1_4.metric(label="Preço Médio do M²", value=f"${df['valor_m2'].mean():,.2f}")
+    # Chave dos gráficos derivados do recorte filtrado
+    key = (store.version('recommended_houses'), hr_filters.freeze(filters))
 
     col2_1, col2_2 = st.columns(2)
 
     with col2_1:
         st.markdown('#### Principais Métricas')
-        plot_distribution_of_variable(df, 'price')
-        plot_bar_chart(df, 'grade', 'price')
+        plot_distribution_of_variable(df, 'price', key)
+        plot_bar_chart(df, 'grade', 'price', key)
     
-    with col2_2:
+    with col2_2, profiling.section('scatter_mapbox'):
         st.markdown('#### Mapa de densidade: Preço x Valor M²')
-        fig = px.scatter_mapbox( df,
-            lat='lat',
-            lon='long',
-            color='price',
-            size='valor_m2',
-            color_continuous_scale=px.colors.cyclical.IceFire,
-            size_max=15,
-            zoom=9.5 )
-
-        fig.update_layout( mapbox_style='open-street-map' )
-        fig.update_layout( height=600, margin={'r': 0, 'l': 0, 'b': 0, 't': 0})
-        st.plotly_chart(fig)
+
+        if df.shape[0] > maps.MAX_MAP_POINTS:
+            st.caption(f'{df.shape[0]} imóveis agregados por região. Filtre até {maps.MAX_MAP_POINTS} imóveis para ver cada ponto.')
+
+        def build_scatter_mapbox():
+            # Acima de MAX_MAP_POINTS imóveis os pontos são agregados numa grade
+            points, aggregated = maps.level_of_detail(df, ['price', 'valor_m2'])
+            fig = px.scatter_mapbox( points,
+                lat='lat',
+                lon='long',
+                color='price',
+                size='valor_m2',
+                hover_data=['imóveis'] if aggregated else None,
+                color_continuous_scale=px.colors.cyclical.IceFire,
+                size_max=15,
+                zoom=9.5 )
+
+            fig.update_layout( mapbox_style='open-street-map' )
+            fig.update_layout( height=600, margin={'r': 0, 'l': 0, 'b': 0, 't': 0})
+            return fig
+
+        figures.plotly_chart(st, 'scatter_mapbox', key, build_scatter_mapbox)
 
     st.markdown('#### Métricas de Resumo')
     col3_1, col3_2 = st.columns((2, 1))
 
-    with col3_1:
+    with col3_1, profiling.section('describe numéricas'):
         st.text('Variáveis numéricas')
 
-        data_numeric = df.select_dtypes(include=['int', 'float'])
-        data_category = df.select_dtypes(exclude=['int', 'float', 'object'])
-        df_num_to_describe = data_numeric.describe().drop(index=['count', '25%', '75%'], \
-            columns=['id', 'lat', 'long', \
-                'grade']) \
+        df_num_to_describe = summary.numeric.drop(index=['count']) \
                 .rename(index={
                     'index': 'Atributos',
                     '50%': 'Mediana', 
@@ -183,13 +179,12 @@ def display_home_page(df, geofile):
                 }).sort_index(ascending=False, axis=1)
         st.dataframe(df_num_to_describe, height=180)
     
-    with col3_2:
+    with col3_2, profiling.section('describe categóricas'):
         st.text('Variáveis categóricas')
         
-        st.dataframe(data_category.drop(columns=['date']) \
-            .rename(columns={'count':'contagem', 'unique': 'únicos'}).describe())
+        st.dataframe(summary.categorical)
 
-    with st.expander("Portfólio de imóveis da House Rocket", expanded=True):
+    with st.expander("Portfólio de imóveis da House Rocket", expanded=True), profiling.section('tabela e exportação'):
         st.write("""
             Tabela com todos os dados dos IMÓVEIS FILTRADOS
         """)
@@ -204,74 +199,65 @@ def display_home_page(df, geofile):
         c1.dataframe(df_attr)
 
         with c2:
-            csv = convert_df_csv(df_attr)
-            #excel = convert_df_excel(df_attr)
-            #json = convert_df_json(df_attr)
+            key = export.export_key(store.version('recommended_houses'), hr_filters.freeze(filters), tuple(f_attributes))
+            download_data(df_attr, 'data', key, widget_key=1)
 
-            st.download_button('Download .csv', data=csv, file_name='data.csv', key=1)
-            #st.download_button('Download .xlsx', data=excel, file_name='data.xlsx', key=2)
-            #st.download_button('Download .json', data=json, file_name='data.json', key=3)
-
-    price_density_maps(df, geofile)
+    price_density_maps(df)
 
     st.header( 'Relatórios de Negócio' )
     tab1, tab2 = st.tabs(["Relatório #1", "Relatório #2"])
 
-    with tab1:
-        df_rep1 = pd.read_csv('data/report1.csv', index_col=0)
+    with tab1, profiling.section('relatório #1'):
+        df_rep1 = store.get_dataset('report1')
         st.markdown("##### Visualizar dataframe dos imóveis RECOMENDADOS PARA COMPRA.")
         st.subheader("Relatório 1: Quais os imóveis que a House Rocket deveria comprar e por qual preço?")
         c1, c2, c3 = st.columns((2, 2, 1))
 
         c1.dataframe(df_rep1)
 
-        df_rep1['profit'] = df_rep1['Median Price'] - df_rep1['price']
-        df_rep1_2 = df_rep1.groupby('zipcode').agg({'profit': 'mean'}).reset_index().sort_values('profit', ascending=False)
-        df_rep1_2['zipcode'] = df_rep1_2['zipcode'].astype(str)
+        df_rep1 = df_rep1.assign(profit=df_rep1['Median Price'] - df_rep1['price'])
+
+        def build_profit_by_zipcode():
+            df_rep1_2 = df_rep1.groupby('zipcode').agg({'profit': 'mean'}).reset_index()
+            df_rep1_2 = df_rep1_2.iloc[ranking.top_k(df_rep1_2['profit'], 10)]
+            df_rep1_2['zipcode'] = df_rep1_2['zipcode'].astype(str)
 
-        with c2:
             # data plot
-            fig = px.bar(df_rep1_2[:10], x='zipcode', y='profit', title='Lucro Médio x Região', color_discrete_sequence=["#8d3941"], labels={
+            fig = px.bar(df_rep1_2, x='zipcode', y='profit', title='Lucro Médio x Região', color_discrete_sequence=["#8d3941"], labels={
                 'profit': 'Lucro médio (USD)',
                 'zipcode': 'Região'
             }, height=400 )
             fig.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 40})
-            st.plotly_chart( fig, use_container_width=True )
+            return fig
 
-        with c3:
-            csv = convert_df_csv(df_rep1)
-            #excel = convert_df_excel(df_rep1)
-            #json = convert_df_json(df_rep1)
+        with c2:
+            figures.plotly_chart( st, 'lucro médio x região', (store.version('report1'),), build_profit_by_zipcode, use_container_width=True )
 
-            st.download_button('Download .csv', data=csv, file_name='report1.csv', key=2)
-            #st.download_button('Download .xlsx', data=excel, file_name='data.xlsx', key=2)
-            #st.download_button('Download .json', data=json, file_name='data.json', key=3)
+        with c3:
+            download_data(df_rep1, 'report1', export.export_key(store.version('report1')), widget_key=2)
 
-    with tab2:
-        df_rep2 = pd.read_csv('data/report2.csv', index_col=0)
+    with tab2, profiling.section('relatório #2'):
+        df_rep2 = store.get_dataset('report2')
         st.markdown("##### Visualizar dataframe dos imóveis RECOMENDADOS PARA VENDA.")
         st.subheader("Relatório 2: Uma vez comprados, quando será a melhor época para revender e por qual preço?")
         c1, c2, c3 = st.columns((2, 2, 1))
 
         c1.dataframe(df_rep2)
 
-        with c2:
+        def build_buy_price_by_season():
             # data plot
             fig = px.bar(df_rep2, x='season', y='Buy Price', title='Preço médio de COMPRA x Estação do Ano', color_discrete_sequence=["#8d3941"], labels={
                 'y': 'Preço médio de COMPRA (USD)',
                 'x': 'Estação do ano'
             }, height=400 )
             fig.update_layout(margin={"b": 0, "l": 0, "r": 0, "t": 40})
-            st.plotly_chart( fig, use_container_width=True )
+            return fig
+
+        with c2:
+            figures.plotly_chart( st, 'preço de compra x estação', (store.version('report2'),), build_buy_price_by_season, use_container_width=True )
         
         with c3:
-            csv = convert_df_csv(df_rep2)
-            #excel = convert_df_excel(df_rep1)
-            #json = convert_df_json(df_rep1)
-
-            st.download_button('Download .csv', data=csv, file_name='report2.csv', key=3)
-            #st.download_button('Download .xlsx', data=excel, file_name='data.xlsx', key=2)
-            #st.download_button('Download .json', data=json, file_name='data.json', key=3) 
+            download_data(df_rep2, 'report2', export.export_key(store.version('report2')), widget_key=3)
                 
 
     return None
@@ -290,55 +276,56 @@ def main():
 
     # ETL
     ## Extract
-    filepath = 'data/recommended_houses.csv'
-        
-    data = get_data(filepath)
-
-    # get geofile
-    url = "https://opendata.arcgis.com/datasets/83fc2e72903343aabff6de8cb445b81c_2.geojson"
-    geofile = get_geofile( url )
-
-    ## Transform
-    data = data_transform(data)
+    with profiling.section('carregamento'):
+        engine = store.get_dataset('recommended_houses_filters')
 
     ## Load
+    # Os filtros são acumulados e aplicados de uma só vez pelo FilterEngine
+    filters = {}
+
     df_controller = st.sidebar.selectbox('Qual grupo de imóveis você deseja visualizar?', \
          options=[0, 1], \
             format_func=lambda x: 'Todos os Imóveis' if x == 0 else 'Apenas Imóveis Recomendados')
 
     if df_controller == 1:
-        data = data.loc[data['status'] == 'Buy', :]
+        filters['status'] = ['Buy']
 
-    with st.sidebar:
+    with st.sidebar, profiling.section('filtros'):
         st.markdown('# Opções de Filtros:')
 
-        price_interval = st.slider('Intervalo de Preço', min_value=int(data['price'].min()), max_value=int(data['price'].max()), value=int(data['price'].max()))
+        min_price, max_price = engine.bounds('price', filters)
+        price_interval = st.slider('Intervalo de Preço', min_value=int(min_price), max_value=int(max_price), value=int(max_price))
+        filters['price'] = price_interval
 
-        f_zipcode = st.multiselect('Filter by Region', options=data['zipcode'].unique())
-        f_season = st.multiselect('Filter by Season', options=data['season'].unique())
+        f_zipcode = st.multiselect('Filter by Region', options=engine.unique('zipcode', filters))
+        f_season = st.multiselect('Filter by Season', options=engine.unique('season', filters))
 
         if f_zipcode != []:
-            data = data.loc[data['zipcode'].isin( f_zipcode ), :]
+            filters['zipcode'] = f_zipcode
         if f_season != []:
-            data = data.loc[data['season'].isin( f_season ), :]
+            filters['season'] = f_season
 
-        yr_built_interval = st.slider('Year Built', min_value=int(data['yr_built'].min()), max_value=int(data['yr_built'].max()), value=int(data['yr_built'].max()))
-        data = data.loc[data['yr_built'] <= yr_built_interval]
+        min_yr_built, max_yr_built = engine.bounds('yr_built', filters)
+        yr_built_interval = st.slider('Year Built', min_value=int(min_yr_built), max_value=int(max_yr_built), value=int(max_yr_built))
+        filters['yr_built'] = yr_built_interval
         
         # filters
-        min_date = datetime.strptime( data['date'].min().strftime( '%Y-%m-%d' ), '%Y-%m-%d' )
-        max_date = datetime.strptime( data['date'].max().strftime( '%Y-%m-%d' ), '%Y-%m-%d' )
+        min_date, max_date = engine.bounds('date', filters)
+        min_date = datetime.strptime( pd.Timestamp(min_date).strftime( '%Y-%m-%d' ), '%Y-%m-%d' )
+        max_date = datetime.strptime( pd.Timestamp(max_date).strftime( '%Y-%m-%d' ), '%Y-%m-%d' )
 
         f_date = st.sidebar.slider( 'Date', min_date, max_date, max_date )
-        data = data[data['date'] <= f_date]
+        filters['date'] = f_date
         
 
         if st.checkbox('Only waterfront houses'):
-            data = data.loc[data['waterfront'] == 1]
+            filters['waterfront'] = [1]
         if st.checkbox('Only renovated houses'):
-            data = data.loc[data['yr_renovated'] > 0]
+            filters['renovated'] = [True]
         if st.checkbox('Only  houses with basement'):
-            data = data.loc[data['has_basement'] == 1]
+            filters['has_basement'] = [1]
+
+        data = schema.expand(engine.apply(filters))
 
         st.markdown('___')
 
@@ -348,8 +335,12 @@ def main():
         st.markdown('___')
 
     # Criando Páginas do Dashboard
-    display_home_page(data, geofile)
+    display_home_page(data, filters)
+
+    # Página já enviada: carrega em segundo plano o que as outras páginas usam
+    lazy.warm_up()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with profiling.profile_run('Página Inicial'):
+        main()
\ No newline at end of file